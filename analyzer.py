@@ -7,61 +7,326 @@ import os
 import io
 import json
 import re
+import asyncio
+import hashlib
+import functools
+import threading
+import multiprocessing
+import httpx
 import pypdf
-from groq import Groq
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from groq import AsyncGroq, BadRequestError
 from dotenv import load_dotenv
+from llm_cache import MemoryCache, get_cache, make_key
+from prompt_budget import fit, count_tokens
+from llm_scheduler import get_scheduler
+from llm_json import (parse_json, AnalyzeResult, MatchResult, RewriteResult, TailorMeta, Keywords,
+                      InterviewMeta, QuestionSet, CoverMeta)
+from resume_parser import ParsedResume, parse_resume, canonical_sections
 
 load_dotenv()
 
 MODEL = "llama-3.3-70b-versatile"
+TEMPERATURE = 0.3
 
-def get_client():
+# Ask Groq for JSON mode (response_format=json_object) on calls expecting JSON;
+# set to 0 for an OpenAI-compatible backend that doesn't support it
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "1") == "1"
+
+# Max Groq calls a single /tailor request keeps in flight at once
+TAILOR_MAX_CONCURRENCY = int(os.getenv("TAILOR_MAX_CONCURRENCY", "6"))
+
+# Rewritten sections kept for re-runs, keyed by (header, content, trimmed JD, style hint)
+TAILOR_SECTION_CACHE_BYTES = int(os.getenv("TAILOR_SECTION_CACHE_BYTES", str(16 * 1024 * 1024)))
+TAILOR_SECTION_CACHE_TTL   = float(os.getenv("TAILOR_SECTION_CACHE_TTL", "86400"))
+
+
+# ── Groq client pool ──────────────────────────────────────────────────────────
+# One lazily created client per event loop so back-to-back calls reuse sockets
+GROQ_MAX_CONNECTIONS  = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+GROQ_MAX_KEEPALIVE    = int(os.getenv("GROQ_MAX_KEEPALIVE", "10"))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "60"))
+GROQ_TIMEOUT          = float(os.getenv("GROQ_TIMEOUT", "60"))
+GROQ_CONNECT_TIMEOUT  = float(os.getenv("GROQ_CONNECT_TIMEOUT", "5"))
+
+_client_lock       = threading.Lock()
+_async_client      = None
+_async_client_loop = None
+_pool_stats        = {"requests": 0, "new_connections": 0}
+
+
+def _api_key() -> str:
     key = os.getenv("GROQ_API_KEY")
     if not key:
         raise RuntimeError("GROQ_API_KEY environment variable is not set")
-    return Groq(api_key=key)
+    return key
+
+
+def _pool_options() -> dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=GROQ_MAX_CONNECTIONS,
+            max_keepalive_connections=GROQ_MAX_KEEPALIVE,
+            keepalive_expiry=GROQ_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(GROQ_TIMEOUT, connect=GROQ_CONNECT_TIMEOUT),
+    }
+
+
+def _count(stat: str):
+    with _client_lock:
+        _pool_stats[stat] += 1
+
+
+# httpcore reports each fresh TCP connect through the "trace" extension;
+# every request that doesn't trigger one was served from the keep-alive pool.
+async def _trace(event: str, info: dict):
+    if event == "connection.connect_tcp.complete":
+        _count("new_connections")
+
+
+async def _on_request(request: httpx.Request):
+    _count("requests")
+    request.extensions["trace"] = _trace
+
+
+def get_async_client() -> AsyncGroq:
+    """Shared AsyncGroq client, rebuilt only if the running event loop changes."""
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        http_client = httpx.AsyncClient(event_hooks={"request": [_on_request]}, **_pool_options())
+        _async_client      = AsyncGroq(api_key=_api_key(), http_client=http_client, max_retries=0)
+        _async_client_loop = loop
+    return _async_client
+
+
+def pool_stats() -> dict:
+    """Keep-alive pool counters for the shared Groq client."""
+    with _client_lock:
+        requests = _pool_stats["requests"]
+        new_conns = _pool_stats["new_connections"]
+    return {
+        "requests":        requests,
+        "new_connections": new_conns,
+        "pool_hits":       max(0, requests - new_conns),
+        "max_connections": GROQ_MAX_CONNECTIONS,
+        "max_keepalive":   GROQ_MAX_KEEPALIVE,
+        "keepalive_expiry": GROQ_KEEPALIVE_EXPIRY,
+    }
 
 
 # ── PDF Text Extraction ───────────────────────────────────────────────────────
-def extract_resume_text(file_bytes: bytes) -> str:
+# Extracted text is memoized by SHA-256 of the upload; that hash doubles as the
+# resume_id other endpoints accept instead of the full resume_text.
+RESUME_CACHE_SIZE = int(os.getenv("RESUME_CACHE_SIZE", "256"))
+
+# Large uploads are split into page chunks and extracted in worker processes;
+# anything under both thresholds is cheaper to parse inline.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+PDF_PARALLEL_MIN_BYTES = int(os.getenv("PDF_PARALLEL_MIN_BYTES", str(2 * 1024 * 1024)))
+PDF_WORKERS            = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_resume_texts = OrderedDict()   # resume_id -> extracted text
+_resume_lock  = threading.Lock()
+_pdf_pool     = None
+
+
+def get_resume_text(resume_id: str) -> str | None:
+    with _resume_lock:
+        text = _resume_texts.get(resume_id)
+        if text is not None:
+            _resume_texts.move_to_end(resume_id)
+        return text
+
+
+def _remember_resume_text(resume_id: str, text: str):
+    with _resume_lock:
+        _resume_texts[resume_id] = text
+        _resume_texts.move_to_end(resume_id)
+        while len(_resume_texts) > RESUME_CACHE_SIZE:
+            _resume_texts.popitem(last=False)
+
+
+def _extract_pages(file_bytes: bytes, start: int, stop: int) -> list[str]:
+    """Raw text of pages [start, stop) — runs inline or inside a pool worker."""
     reader = pypdf.PdfReader(io.BytesIO(file_bytes))
+    return [reader.pages[i].extract_text() for i in range(start, stop)]
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _resume_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _pdf_pool
+
+
+def parse_pdf_text(file_bytes: bytes, parallel: bool | None = None) -> str:
+    """Extract text from every page, fanning out to the process pool for big files."""
+    page_count = len(pypdf.PdfReader(io.BytesIO(file_bytes)).pages)
+    if parallel is None:
+        parallel = (page_count >= PDF_PARALLEL_MIN_PAGES
+                    or len(file_bytes) >= PDF_PARALLEL_MIN_BYTES)
+    workers = min(PDF_WORKERS, page_count)
+    if not parallel or workers < 2:
+        raw_pages = _extract_pages(file_bytes, 0, page_count)
+    else:
+        step   = -(-page_count // workers)
+        starts = list(range(0, page_count, step))
+        chunks = _get_pdf_pool().map(_extract_pages,
+            [file_bytes] * len(starts), starts, [min(s + step, page_count) for s in starts])
+        raw_pages = [t for chunk in chunks for t in chunk]
     pages = []
-    for page in reader.pages:
-        t = page.extract_text()
+    for t in raw_pages:
         if t:
             pages.append(t.strip())
     return "\n\n".join(pages)
 
 
+def load_resume(file_bytes: bytes) -> tuple[str, str]:
+    """Return (resume_id, text) for a PDF, parsing it only on a cache miss."""
+    resume_id = hashlib.sha256(file_bytes).hexdigest()
+    cached = get_resume_text(resume_id)
+    if cached is not None:
+        return resume_id, cached
+    text = parse_pdf_text(file_bytes)
+    if text.strip():
+        _remember_resume_text(resume_id, text)
+    return resume_id, text
+
+
+def extract_resume_text(file_bytes: bytes) -> str:
+    return load_resume(file_bytes)[1]
+
+
 # ── Groq call helper ──────────────────────────────────────────────────────────
-def call_groq(system: str, user: str, max_tokens: int = 2048) -> str:
-    response = get_client().chat.completions.create(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user",   "content": user},
-        ],
-        temperature=0.3,
-        max_tokens=max_tokens,
-    )
-    return response.choices[0].message.content.strip()
+# All helpers consult the response cache first; identical prompts are free.
+# Misses go through the scheduler, which owns rate limiting and retries (the
+# SDK's own retries are off so 429s are seen and shared across callers).
+def _messages(system: str, user: str) -> list[dict]:
+    return [
+        {"role": "system", "content": system},
+        {"role": "user",   "content": user},
+    ]
+
 
+# Single flight: concurrent identical prompts (a double-click, two UI flows
+# firing /analyze) share one upstream call. Followers await the leader's
+# result, or its exception, instead of calling Groq again.
+_inflight_lock  = threading.Lock()
+_inflight       = {}     # key → Task of the leading call
+_inflight_loop  = None
+_inflight_stats = {"upstream": 0, "coalesced": 0}
 
-def parse_json(text: str) -> dict:
-    """Extract JSON from LLM response even if it has extra text."""
-    match = re.search(r'\{.*\}', text, re.DOTALL)
-    if match:
-        return json.loads(match.group())
-    return json.loads(text)
+
+def _failed_generation(error: BadRequestError) -> str | None:
+    """The text Groq rejects in JSON mode (e.g. cut off at max_tokens), for repair."""
+    body = error.body if isinstance(error.body, dict) else {}
+    body = body.get("error", body)
+    return body.get("failed_generation") if isinstance(body, dict) else None
+
+
+async def _acall_upstream(system: str, user: str, max_tokens: int, key: str, json_mode: bool) -> str:
+    create = get_async_client().chat.completions.with_raw_response.create
+    extra  = {"response_format": {"type": "json_object"}} if json_mode and LLM_JSON_MODE else {}
+    try:
+        response = await get_scheduler().run(
+            lambda: create(model=MODEL, messages=_messages(system, user),
+                           temperature=TEMPERATURE, max_tokens=max_tokens, **extra),
+            count_tokens(system) + count_tokens(user), max_tokens,
+        )
+    except BadRequestError as e:
+        failed = _failed_generation(e) if extra else None
+        if not failed:
+            raise
+        return failed        # parse_json repairs it; never cached
+    text  = response.choices[0].message.content.strip()
+    cache = get_cache()
+    if cache is not None:
+        await cache.aset(key, text)
+    return text
+
+
+def _release_inflight(key: str, task: asyncio.Task):
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()     # retrieved here so an unawaited failure isn't logged
+
+
+async def acall_groq(system: str, user: str, max_tokens: int = 2048, json_mode: bool = False) -> str:
+    """Completion text for one prompt, awaited without blocking the loop.
+
+    json_mode requests a JSON object (the prompt must say so and describe it).
+    """
+    global _inflight, _inflight_loop
+    cache = get_cache()
+    key   = make_key(MODEL, system, user, max_tokens, TEMPERATURE)
+    if cache is not None:
+        cached = await cache.aget(key)
+        if cached is not None:
+            return cached
+    loop = asyncio.get_running_loop()
+    if _inflight_loop is not loop:
+        _inflight, _inflight_loop = {}, loop
+    task = _inflight.get(key)
+    if task is None:
+        task = _inflight[key] = loop.create_task(_acall_upstream(system, user, max_tokens, key, json_mode))
+        task.add_done_callback(functools.partial(_release_inflight, key))
+        stat = "upstream"
+    else:
+        stat = "coalesced"
+    with _inflight_lock:
+        _inflight_stats[stat] += 1
+    # Shielded: one caller disconnecting must not cancel the call the others await
+    return await asyncio.shield(task)
+
+
+def inflight_stats() -> dict:
+    """Upstream calls made vs identical concurrent calls that joined one."""
+    with _inflight_lock:
+        return {**_inflight_stats, "in_flight": len(_inflight)}
+
+
+async def astream_groq(system: str, user: str, max_tokens: int = 2048):
+    """Yield completion text as it streams in; a cache hit is yielded in one piece."""
+    cache = get_cache()
+    key   = make_key(MODEL, system, user, max_tokens, TEMPERATURE)
+    if cache is not None:
+        cached = await cache.aget(key)
+        if cached is not None:
+            yield cached
+            return
+    # Retries cover opening the stream only; a failure mid-stream propagates
+    create = get_async_client().chat.completions.with_raw_response.create
+    stream = await get_scheduler().run(
+        lambda: create(model=MODEL, messages=_messages(system, user),
+                       temperature=TEMPERATURE, max_tokens=max_tokens, stream=True),
+        count_tokens(system) + count_tokens(user), max_tokens,
+    )
+    parts = []
+    try:
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+    finally:
+        await stream.close()
+    if cache is not None:
+        await cache.aset(key, "".join(parts).strip())
 
 
 # ── Resume Analyzer ───────────────────────────────────────────────────────────
-def analyze_resume(resume_text: str) -> dict:
-    system = """You are an expert resume reviewer and career coach with 15 years of experience.
+# The model returns findings only; resume_text and missing_sections are filled
+# in locally so no output tokens go to echoing the resume back.
+ANALYZE_SYSTEM = """You are an expert resume reviewer and career coach with 15 years of experience.
 Analyze the resume and return ONLY valid JSON with this exact structure:
 {
   "overall_score": <integer 0-100>,
-  "resume_text": "<the full resume text>",
   "scores": {
     "clarity": <0-100>,
     "impact": <0-100>,
@@ -78,7 +343,6 @@ Analyze the resume and return ONLY valid JSON with this exact structure:
   "strengths": ["strength1", "strength2", "strength3"],
   "weaknesses": ["weakness1", "weakness2", "weakness3"],
   "ats_issues": ["issue1", "issue2"],
-  "missing_sections": ["section1"],
   "improvement_tips": [
     {"area": "area name", "tip": "specific actionable tip"},
     {"area": "area name", "tip": "specific actionable tip"},
@@ -86,17 +350,43 @@ Analyze the resume and return ONLY valid JSON with this exact structure:
   ],
   "weak_bullets": ["bullet1", "bullet2", "bullet3"]
 }
-Be specific and actionable. Focus on real improvements."""
+Be specific and actionable. Focus on real improvements.
+Keep each string under 25 words; copy weak bullets verbatim. Do not repeat the resume."""
+
+ANALYZE_MAX_TOKENS = 1024
 
-    user = f"Analyze this resume:\n\n{resume_text}"
-    raw = call_groq(system, user, max_tokens=2048)
-    result = parse_json(raw)
-    result["resume_text"] = resume_text  # always attach full text
+# Sections every resume is expected to have, with the header words that satisfy each
+EXPECTED_SECTIONS = {
+    "Summary":    ("summary", "objective", "profile"),
+    "Experience": ("experience", "employment", "work history"),
+    "Skills":     ("skills", "competencies", "technologies"),
+    "Education":  ("education",),
+}
+CONTACT_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+|linkedin\.com/|\+?(?:\d[\s().-]{0,2}){10,}")
+
+
+def find_missing_sections(resume_text: str) -> list[str]:
+    """Expected sections with no matching header line, plus contact details if absent."""
+    headers = [section.key for section in parse_resume(resume_text).sections]
+    missing = [name for name, words in EXPECTED_SECTIONS.items()
+               if not any(word in header for header in headers for word in words)]
+    if not CONTACT_RE.search(resume_text[:1500]):
+        missing.insert(0, "Contact Information")
+    return missing
+
+
+async def analyze_resume(resume_text: str) -> dict:
+    resume_fit, _ = fit("analyze", ANALYZE_SYSTEM, resume_text)
+    user = f"Analyze this resume:\n\n{resume_fit}"
+    raw = await acall_groq(ANALYZE_SYSTEM, user, max_tokens=ANALYZE_MAX_TOKENS, json_mode=True)
+    result = parse_json(raw, AnalyzeResult)
+    result["missing_sections"] = find_missing_sections(resume_text)
+    result["resume_text"]      = resume_text  # always attach full text
     return result
 
 
 # ── Job Matcher ───────────────────────────────────────────────────────────────
-def match_job(resume_text: str, job_description: str) -> dict:
+async def match_job(resume_text: str, job_description: str) -> dict:
     system = """You are an expert ATS system and career coach.
 Compare the resume to the job description and return ONLY valid JSON:
 {
@@ -114,13 +404,39 @@ Compare the resume to the job description and return ONLY valid JSON:
   "summary": "<2-3 sentence honest assessment>"
 }"""
 
-    user = f"RESUME:\n{resume_text}\n\nJOB DESCRIPTION:\n{job_description}"
-    raw = call_groq(system, user, max_tokens=1024)
-    return parse_json(raw)
+    resume_fit, job_fit = fit("match", system, resume_text, job_description)
+    user = f"RESUME:\n{resume_fit}\n\nJOB DESCRIPTION:\n{job_fit}"
+    raw = await acall_groq(system, user, max_tokens=1024, json_mode=True)
+    return parse_json(raw, MatchResult)
+
+
+MATCH_BATCH_MAX_JOBS    = int(os.getenv("MATCH_BATCH_MAX_JOBS", "25"))
+MATCH_BATCH_CONCURRENCY = int(os.getenv("MATCH_BATCH_CONCURRENCY", "4"))
+
+
+async def match_jobs_batch(resume_text: str, job_descriptions: list[str],
+                           max_concurrency: int | None = None) -> list[dict]:
+    """Score one resume against many job descriptions with bounded concurrency.
+
+    Results come back in input order; a failed item carries "error" instead of
+    "result" so one bad listing doesn't sink the whole batch.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency or MATCH_BATCH_CONCURRENCY))
+
+    async def run(index, job_description):
+        if not job_description.strip():
+            return {"index": index, "error": "Empty job description."}
+        async with semaphore:
+            try:
+                return {"index": index, "result": await match_job(resume_text, job_description)}
+            except Exception as e:
+                return {"index": index, "error": str(e)}
+
+    return await asyncio.gather(*(run(i, jd) for i, jd in enumerate(job_descriptions)))
 
 
 # ── Bullet Rewriter ───────────────────────────────────────────────────────────
-def rewrite_bullets(bullets: list[str], job_title: str = "") -> dict:
+async def rewrite_bullets(bullets: list[str], job_title: str = "") -> dict:
     job_context = f" for a {job_title} role" if job_title else ""
     system = """You are an expert resume writer. Rewrite resume bullet points to be more impactful.
 Use strong action verbs, add quantification where possible, and show clear impact.
@@ -133,15 +449,106 @@ Return ONLY valid JSON:
 }"""
 
     user = f"Rewrite these weak resume bullets{job_context}:\n" + "\n".join(f"- {b}" for b in bullets)
-    raw = call_groq(system, user, max_tokens=1024)
-    return parse_json(raw)
+    raw = await acall_groq(system, user, max_tokens=1024, json_mode=True)
+    return parse_json(raw, RewriteResult)
+
+
+# ── Keyword bolding ───────────────────────────────────────────────────────────
+# Keywords compile once into a trie-shaped regex (shared prefixes factored out,
+# longest match preferred) and are memoized per keyword set.
+KEYWORD_PATTERN_CACHE_SIZE = int(os.getenv("KEYWORD_PATTERN_CACHE_SIZE", "128"))
+
+BULLET_CHARS      = ("•", "▪", "●", "-", "–", "◦")
+NEXT_BULLET_CHARS = BULLET_CHARS + ("Technologies",)
+
+
+def _trie_regex(words: list[str]) -> str:
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+@functools.lru_cache(maxsize=KEYWORD_PATTERN_CACHE_SIZE)
+def keyword_pattern(keywords: frozenset) -> re.Pattern:
+    """Case-insensitive matcher for a lowercased keyword set, skipping already-bolded text."""
+    return re.compile(r'(?<!\*)(' + _trie_regex(sorted(keywords)) + r')(?!\*)', re.IGNORECASE)
+
+
+def bold_keywords_in_text(text: str, keywords: list) -> str:
+    """Wrap matching keywords with ** in bullet/body/project-name lines."""
+    key = frozenset(k.strip().lower() for k in keywords if isinstance(k, str) and k.strip())
+    if not key:
+        return text
+    pattern = keyword_pattern(key)
+
+    result_lines = []
+    lines = text.splitlines()
+    for idx, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            result_lines.append(line)
+            continue
+
+        is_bullet      = stripped.startswith(BULLET_CHARS)
+        is_body        = len(stripped) > 30 and not stripped.isupper()
+        # Project name: short non-bullet line followed by a bullet line
+        next_stripped  = lines[idx+1].strip() if idx+1 < len(lines) else ""
+        next_is_bullet = next_stripped.startswith(NEXT_BULLET_CHARS)
+        is_project_name = (not is_bullet and not stripped.isupper()
+                           and len(stripped) < 80 and next_is_bullet)
+
+        if is_bullet or is_body or is_project_name:
+            line = pattern.sub(r"**\1**", line)
+        result_lines.append(line)
+    return "\n".join(result_lines)
 
 
 # ── Resume Tailor ─────────────────────────────────────────────────────────────
-def tailor_resume(resume_text: str, job_description: str) -> dict:
-    job_trimmed = job_description[:2000]
+_section_cache = MemoryCache(max_bytes=TAILOR_SECTION_CACHE_BYTES, ttl=TAILOR_SECTION_CACHE_TTL)
+
+
+def section_cache_key(header: str, content: str, job: str, style_hint: str) -> str:
+    """Stable across header case/colons and per-line whitespace edits to the content."""
+    def digest(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    lines = "\n".join(" ".join(line.split()) for line in content.splitlines() if line.strip())
+    return digest(json.dumps([MODEL, TEMPERATURE, header.strip().rstrip(":").strip().upper(),
+                              digest(lines), digest(job), style_hint]))
+
+
+def tailor_stats() -> dict:
+    return {"section_cache": _section_cache.stats()}
+
+
+async def tailor_resume(resume_text: str, job_description: str,
+                        max_concurrency: int | None = None) -> dict:
+    """Tailor every section concurrently; sections keep their original order."""
+    async for event in tailor_resume_events(resume_text, job_description, max_concurrency):
+        if event["event"] == "done":
+            return event["data"]
+
+
+async def tailor_resume_events(resume_text: str, job_description: str,
+                               max_concurrency: int | None = None):
+    """Yield tailoring progress as {"event", "data"} dicts.
 
-    # ── Step 1: Get metadata (small call, just JSON) ──────────────────────────
+    Events: header, keywords, section (one per section as it finishes, already
+    bolded, with its original index), meta, and finally done with the same
+    payload tailor_resume returns.
+    """
+    # ── Step 1: Metadata prompt (small call, just JSON) ───────────────────────
     meta_system = """You are an expert resume writer.
 Analyze how to tailor the resume for the job description.
 Return ONLY valid JSON, no extra text:
@@ -150,50 +557,9 @@ Return ONLY valid JSON, no extra text:
   "keywords_to_add": ["keyword1", "keyword2", "keyword3"],
   "match_improvement": "Estimated match improved from X% to Y%"
 }"""
-    meta_raw = call_groq(meta_system,
-        f"RESUME:\n{resume_text[:3000]}\n\nJOB DESCRIPTION:\n{job_trimmed}",
-        max_tokens=600)
-    meta = parse_json(meta_raw)
-
-    # ── Step 2: Split resume into sections so nothing gets truncated ──────────
-    import re
-
-    SECTION_RE = re.compile(
-        r'^(PROFESSIONAL SUMMARY|SUMMARY|OBJECTIVE|PROFILE|'
-        r'PROFESSIONAL EXPERIENCE|WORK EXPERIENCE|EXPERIENCE|EMPLOYMENT|'
-        r'TECHNICAL SKILLS|SKILLS|COMPETENCIES|'
-        r'EDUCATION|'
-        r'PROJECTS|'
-        r'CERTIFICATIONS?|CERTIFICATES|LICENSES|'
-        r'ACHIEVEMENTS?|AWARDS|HONORS|'
-        r'PUBLICATIONS?|RESEARCH|'
-        r'VOLUNTEER|LANGUAGES|INTERESTS)\s*:?\s*$',
-        re.IGNORECASE | re.MULTILINE
-    )
-
-    def split_sections(text):
-        """Split resume into list of (header, content) tuples."""
-        lines   = text.strip().splitlines()
-        sections = []
-        header_block = []  # name + contact before first section
-        cur_header = None
-        cur_lines  = []
-        for line in lines:
-            stripped = line.strip()
-            if SECTION_RE.match(stripped):
-                if cur_header is not None:
-                    sections.append((cur_header, "\n".join(cur_lines).strip()))
-                elif cur_lines:
-                    header_block = list(cur_lines)
-                cur_header = stripped
-                cur_lines  = []
-            else:
-                cur_lines.append(line)
-        if cur_header is not None:
-            sections.append((cur_header, "\n".join(cur_lines).strip()))
-        return header_block, sections
 
-    def tailor_section(header, content, jd, style_hint):
+    # ── Step 2: Rewrite one section at a time so nothing gets truncated ───────
+    async def tailor_section(header, content, jd, style_hint):
         """Tailor a single resume section to match the job description."""
         system = f"""You are an expert resume writer.
 Rewrite ONLY the {header} section of the resume to better match the job description.
@@ -205,7 +571,7 @@ Rules:
 - Output ONLY the rewritten section content (no header, no explanation)
 {style_hint}"""
         user = f"JOB DESCRIPTION:\n{jd}\n\n{header} SECTION:\n{content}\n\nRewrite this section:"
-        return call_groq(system, user, max_tokens=2000)
+        return await limited(acall_groq(system, user, max_tokens=2000))
 
     STYLE_HINTS = {
         "experience": "Keep ALL jobs and ALL bullet points. Only rephrase for keywords.",
@@ -223,97 +589,131 @@ Rules:
                 return hint
         return "Keep all original information. Only rephrase for better keyword match."
 
-    # ── Step 3: Extract keywords to bold from job description ────────────────
+    # ── Step 3: Keyword prompt — terms to bold from the job description ──────
     kw_system = """You are a resume keyword analyst.
 Extract the most important technical keywords and skills from the job description.
 These will be bolded in the resume to catch recruiter and ATS attention.
-Return ONLY a JSON array of keywords — no explanation:
-["keyword1", "keyword2", "keyword3", ...]
+Return ONLY a JSON object with the keywords — no explanation:
+{"keywords": ["keyword1", "keyword2", "keyword3", ...]}
 Rules:
 - Include: tools, technologies, languages, frameworks, platforms, methodologies
 - Include multi-word terms like "CI/CD", "Infrastructure as Code", "REST APIs"
 - Max 30 keywords
 - Short, exact terms only (no sentences)"""
-    kw_raw      = call_groq(kw_system, f"JOB DESCRIPTION:\n{job_trimmed}", max_tokens=400)
-    bold_keywords = parse_json(kw_raw) if kw_raw else []
-    if not isinstance(bold_keywords, list):
-        bold_keywords = []
-
-    def bold_keywords_in_text(text, keywords):
-        """Wrap matching keywords with ** in bullet/body/project-name lines."""
-        if not keywords:
-            return text
-        kws_sorted = sorted(keywords, key=len, reverse=True)
-        escaped    = [re.escape(k) for k in kws_sorted]
-        pattern    = re.compile(
-            r'(?<!\*)(' + '|'.join(escaped) + r')(?!\*)',
-            re.IGNORECASE
-        )
-        def replacer(m):
-            return f"**{m.group(1)}**"
-
-        result_lines = []
-        lines = text.splitlines()
-        for idx, line in enumerate(lines):
-            stripped = line.strip()
-            if not stripped:
-                result_lines.append(line)
-                continue
-
-            is_bullet      = stripped.startswith(("•","▪","●","-","–","◦"))
-            is_body        = len(stripped) > 30 and not stripped.isupper()
-            # Project name: short non-bullet line followed by a bullet line
-            next_stripped  = lines[idx+1].strip() if idx+1 < len(lines) else ""
-            next_is_bullet = next_stripped.startswith(("•","▪","●","-","–","◦","Technologies"))
-            is_project_name = (not is_bullet and not stripped.isupper()
-                               and len(stripped) < 80 and next_is_bullet)
-
-            if is_bullet or is_body or is_project_name:
-                line = pattern.sub(replacer, line)
-            result_lines.append(line)
-        return "\n".join(result_lines)
 
-    # ── Step 4: Tailor each section independently ─────────────────────────────
-    header_block, sections = split_sections(resume_text)
+    # ── Step 4: Fan out meta, keywords and every section rewrite at once ─────
+    # Sections split on standard headers only (parse shared with PDF rendering)
+    header_block, sections = canonical_sections(parse_resume(resume_text))
     name_contact = "\n".join(header_block).strip()
 
-    tailored_parts = [name_contact] if name_contact else []
+    semaphore = asyncio.Semaphore(max(1, max_concurrency or TAILOR_MAX_CONCURRENCY))
+
+    async def limited(coro):
+        async with semaphore:
+            return await coro
+
+    meta_resume, meta_job = fit("tailor_meta", meta_system, resume_text, job_description)
+    _, kw_job             = fit("tailor_keywords", kw_system, job=job_description)
+    _, section_job        = fit("tailor_section", job=job_description)
+
+    meta_task = asyncio.ensure_future(limited(acall_groq(meta_system,
+        f"RESUME:\n{meta_resume}\n\nJOB DESCRIPTION:\n{meta_job}",
+        max_tokens=600, json_mode=True)))
+    kw_task = asyncio.ensure_future(limited(acall_groq(kw_system,
+        f"JOB DESCRIPTION:\n{kw_job}", max_tokens=400, json_mode=True)))
+    # Unchanged sections come straight from the section cache; only the rest hit the LLM
+    section_keys = [section_cache_key(sec_header, sec_content, section_job, get_hint(sec_header))
+                    for sec_header, sec_content in sections]
+    reused = [_section_cache.get(key) if sec_content.strip() else None
+              for key, (_, sec_content) in zip(section_keys, sections)]
+    section_tasks = [
+        asyncio.ensure_future(tailor_section(sec_header, sec_content, section_job, get_hint(sec_header)))
+        if sec_content.strip() and cached is None else None
+        for (sec_header, sec_content), cached in zip(sections, reused)
+    ]
+    pending = [t for t in [meta_task, kw_task, *section_tasks] if t is not None]
 
     BOLD_SECTIONS = {"experience", "projects", "summary"}
 
-    for sec_header, sec_content in sections:
-        if not sec_content.strip():
-            tailored_parts.append(f"\n{sec_header}\n")
-            continue
-        hint          = get_hint(sec_header)
-        tailored_body = tailor_section(sec_header, sec_content, job_trimmed, hint)
-        tailored_body = tailored_body.strip()
-
+    def finish_section(sec_header, body):
+        body = body.strip()
         # Apply keyword bolding to Experience, Projects, Summary sections
         sec_key = sec_header.lower()
         should_bold = any(k in sec_key for k in BOLD_SECTIONS)
         if should_bold and bold_keywords:
-            tailored_body = bold_keywords_in_text(tailored_body, bold_keywords)
-
-        tailored_parts.append(f"\n{sec_header}\n{tailored_body}")
+            body = bold_keywords_in_text(body, bold_keywords)
+        return body
+
+    try:
+        yield {"event": "header", "data": {"text": name_contact}}
+
+        kw_raw        = await kw_task
+        bold_keywords = parse_json(kw_raw, Keywords)["keywords"] if kw_raw else []
+        yield {"event": "keywords", "data": {"bold_keywords": bold_keywords}}
+
+        # ── Step 5: Emit sections as they land, then reassemble in order ─────
+        bodies     = [""] * len(sections)
+        task_index = {task: i for i, task in enumerate(section_tasks) if task is not None}
+        for i, task in enumerate(section_tasks):
+            if task is None:
+                bodies[i] = finish_section(sections[i][0], reused[i]) if reused[i] is not None else ""
+                yield {"event": "section",
+                       "data": {"index": i, "header": sections[i][0], "content": bodies[i],
+                                "reused": reused[i] is not None}}
+
+        meta    = None
+        waiting = set(task_index) | {meta_task}
+        while waiting:
+            done, waiting = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda t: task_index.get(t, -1)):
+                if task is meta_task:
+                    meta = parse_json(task.result(), TailorMeta)
+                    yield {"event": "meta", "data": {
+                        "changes_made":      meta.get("changes_made", []),
+                        "keywords_added":    meta.get("keywords_to_add", []),
+                        "match_improvement": meta.get("match_improvement", ""),
+                    }}
+                    continue
+                i = task_index[task]
+                _section_cache.set(section_keys[i], task.result())
+                bodies[i] = finish_section(sections[i][0], task.result())
+                yield {"event": "section",
+                       "data": {"index": i, "header": sections[i][0], "content": bodies[i],
+                                "reused": False}}
+    finally:
+        for t in pending:
+            t.cancel()
 
+    tailored_parts = [name_contact] if name_contact else []
+    for (sec_header, _), body in zip(sections, bodies):
+        tailored_parts.append(f"\n{sec_header}\n{body}")
     tailored_text = "\n".join(tailored_parts).strip()
+    parse_resume(clean_resume_markdown(tailored_text))   # warm the parse a download will need
 
-    return {
+    yield {"event": "done", "data": {
         "tailored_resume":   tailored_text,
         "changes_made":      meta.get("changes_made", []),
         "keywords_added":    meta.get("keywords_to_add", []),
         "match_improvement": meta.get("match_improvement", ""),
         "bold_keywords":     bold_keywords,
-    }
+        "sections_reused":   sum(cached is not None for cached in reused),
+        "sections_total":    len(sections),
+    }}
 
 
 # ── Interview Q&A Generator ───────────────────────────────────────────────────
-def generate_interview_qa(resume_text: str, job_description: str) -> dict:
-    resume_trimmed = resume_text[:3000]
-    job_trimmed    = job_description[:2000]
+INTERVIEW_MAX_BATCHES = int(os.getenv("INTERVIEW_MAX_BATCHES", "3"))
 
-    # Step 1: Get role, topics, red flags
+
+async def generate_interview_qa(resume_text: str, job_description: str, batches: int = 1) -> dict:
+    """Meta and every question batch are independent, so they run concurrently.
+
+    Each batch is one behavioral/situational call plus one technical/general
+    call (10 questions); extra batches are steered away from the first set.
+    """
+    batches = max(1, min(batches, INTERVIEW_MAX_BATCHES))
+
+    # Meta: role, topics, red flags
     meta_system = """You are an expert interview coach.
 Return ONLY valid JSON:
 {
@@ -321,11 +721,8 @@ Return ONLY valid JSON:
   "key_topics_to_study": ["topic1", "topic2", "topic3", "topic4", "topic5"],
   "red_flags_to_avoid": ["mistake1", "mistake2", "mistake3"]
 }"""
-    meta_raw = call_groq(meta_system,
-        f"RESUME:\n{resume_trimmed}\n\nJOB:\n{job_trimmed}", max_tokens=500)
-    meta = parse_json(meta_raw)
 
-    # Step 2: Generate 5 behavioral + situational questions
+    # 5 behavioral + situational questions
     qa1_system = """You are an expert interview coach.
 Generate 5 behavioral and situational interview questions with ideal answers.
 Return ONLY valid JSON:
@@ -333,12 +730,8 @@ Return ONLY valid JSON:
   {"category": "Behavioral", "question": "...", "ideal_answer": "...(2-3 sentences using STAR)...", "tip": "..."},
   {"category": "Situational", "question": "...", "ideal_answer": "...", "tip": "..."}
 ]}"""
-    qa1_raw = call_groq(qa1_system,
-        f"RESUME:\n{resume_trimmed}\n\nJOB:\n{job_trimmed}\n\nGenerate 5 behavioral/situational questions.",
-        max_tokens=2000)
-    qa1 = parse_json(qa1_raw)
 
-    # Step 3: Generate 5 technical + general questions
+    # 5 technical + general questions
     qa2_system = """You are an expert interview coach.
 Generate 5 technical and general interview questions with ideal answers.
 Return ONLY valid JSON:
@@ -346,27 +739,64 @@ Return ONLY valid JSON:
   {"category": "Technical", "question": "...", "ideal_answer": "...", "tip": "..."},
   {"category": "General", "question": "...", "ideal_answer": "...", "tip": "..."}
 ]}"""
-    qa2_raw = call_groq(qa2_system,
-        f"RESUME:\n{resume_trimmed}\n\nJOB:\n{job_trimmed}\n\nGenerate 5 technical/general questions.",
-        max_tokens=2000)
-    qa2 = parse_json(qa2_raw)
 
-    all_questions = qa1.get("questions", []) + qa2.get("questions", [])
+    # Budgeted against the longest system prompt the shared context is sent with
+    resume_trimmed, job_trimmed = fit("interview", qa1_system, resume_text, job_description)
+    context = f"RESUME:\n{resume_trimmed}\n\nJOB:\n{job_trimmed}"
+
+    qa_calls = []
+    for batch in range(batches):
+        variation = "" if batch == 0 else (
+            f"\nThis is question set #{batch + 1}: avoid the most common questions "
+            "and cover different skills and situations than a typical first set.")
+        qa_calls.append(acall_groq(qa1_system,
+            f"{context}\n\nGenerate 5 behavioral/situational questions.{variation}",
+            max_tokens=2000, json_mode=True))
+        qa_calls.append(acall_groq(qa2_system,
+            f"{context}\n\nGenerate 5 technical/general questions.{variation}",
+            max_tokens=2000, json_mode=True))
+
+    meta_raw, *qa_raws = await asyncio.gather(
+        acall_groq(meta_system, context, max_tokens=500, json_mode=True), *qa_calls)
+    meta = parse_json(meta_raw, InterviewMeta)
+
+    question_sets = []
+    for raw in qa_raws:
+        try:
+            question_sets.append(parse_json(raw, QuestionSet)["questions"])
+        except ValueError:
+            continue         # the other sets still make a usable answer
+    if not question_sets:
+        raise ValueError("Model output contained no interview questions.")
+
+    all_questions = []
+    seen = set()
+    for questions in question_sets:
+        for q in questions:
+            key = re.sub(r"\W+", " ", str(q.get("question", ""))).strip().lower()
+            if key and key in seen:
+                continue
+            seen.add(key)
+            all_questions.append(q)
 
     return {
         "role":                meta.get("role", ""),
-        "questions":           all_questions[:10],
+        "questions":           all_questions[:10 * batches],
         "key_topics_to_study": meta.get("key_topics_to_study", []),
         "red_flags_to_avoid":  meta.get("red_flags_to_avoid", []),
     }
 
 
 # ── Cover Letter Generator ────────────────────────────────────────────────────
-def generate_cover_letter(resume_text: str, job_description: str, tone: str = "professional") -> dict:
-    job_trimmed    = job_description[:2000]
-    resume_trimmed = resume_text[:4000]
+async def generate_cover_letter(resume_text: str, job_description: str, tone: str = "professional") -> dict:
+    async for event in cover_letter_events(resume_text, job_description, tone):
+        if event["event"] == "done":
+            return event["data"]
 
-    # Step 1: Extract job details
+
+async def cover_letter_events(resume_text: str, job_description: str, tone: str = "professional"):
+    """Yield {"event", "data"} dicts: token (letter text deltas), meta, subject, done."""
+    # Step 1: Extract job details (runs alongside the letter — it doesn't need it)
     meta_system = """You are an expert career coach.
 Extract key details from the job description. Return ONLY valid JSON:
 {
@@ -375,8 +805,6 @@ Extract key details from the job description. Return ONLY valid JSON:
   "key_requirements": ["req1", "req2", "req3"],
   "company_values": ["value1", "value2"]
 }"""
-    meta_raw = call_groq(meta_system, f"JOB DESCRIPTION:\n{job_trimmed}", max_tokens=400)
-    meta     = parse_json(meta_raw)
 
     # Step 2: Generate cover letter
     tone_instructions = {
@@ -398,25 +826,119 @@ Rules:
 - Do NOT use placeholder text like [Your Name] — use the actual name from resume
 - Output ONLY the cover letter text, no subject line, no explanation"""
 
+    resume_trimmed, job_trimmed = fit("cover_letter", cl_system, resume_text, job_description)
+    _, meta_job = fit("cover_meta", meta_system, job=job_description)
     cl_user = f"RESUME:\n{resume_trimmed}\n\nJOB DESCRIPTION:\n{job_trimmed}\n\nWrite the cover letter:"
-    cover_letter = call_groq(cl_system, cl_user, max_tokens=1200)
 
-    # Step 3: Generate subject line
+    # Step 3: Subject line — needs meta plus the letter's opening 400 chars
     subj_system = "Write a compelling email subject line for this cover letter application. Return ONLY the subject line, nothing else."
-    subj_user   = f"Job: {meta.get('job_title','Software Engineer')} at {meta.get('company_name','the company')}\nCover letter:\n{cover_letter[:400]}"
-    subject_line = call_groq(subj_system, subj_user, max_tokens=60).strip().strip('"')
 
-    return {
+    async def write_subject(opening):
+        meta = parse_json(await meta_task, CoverMeta)
+        subj_user = f"Job: {meta['job_title'] or 'Software Engineer'} at {meta['company_name'] or 'the company'}\nCover letter:\n{opening}"
+        return (await acall_groq(subj_system, subj_user, max_tokens=60)).strip().strip('"')
+
+    # Stream the letter and kick off the subject line as soon as its opening is in
+    meta_task    = asyncio.ensure_future(
+        acall_groq(meta_system, f"JOB DESCRIPTION:\n{meta_job}", max_tokens=400, json_mode=True))
+    subject_task = None
+    streamed     = ""
+    try:
+        async for delta in astream_groq(cl_system, cl_user, max_tokens=1200):
+            streamed += delta
+            yield {"event": "token", "data": {"text": delta}}
+            if subject_task is None and len(streamed.lstrip()) >= 400:
+                subject_task = asyncio.ensure_future(write_subject(streamed.lstrip()[:400]))
+        cover_letter = streamed.strip()
+        if subject_task is None:
+            subject_task = asyncio.ensure_future(write_subject(cover_letter[:400]))
+        meta = parse_json(await meta_task, CoverMeta)
+        yield {"event": "meta", "data": {
+            "company_name":     meta.get("company_name", ""),
+            "job_title":        meta.get("job_title", ""),
+            "key_requirements": meta.get("key_requirements", []),
+        }}
+        subject_line = await subject_task
+        yield {"event": "subject", "data": {"subject_line": subject_line}}
+    finally:
+        for task in (meta_task, subject_task):
+            if task is not None:
+                task.cancel()
+
+    yield {"event": "done", "data": {
         "cover_letter":   cover_letter.strip(),
         "subject_line":   subject_line,
         "company_name":   meta.get("company_name", ""),
         "job_title":      meta.get("job_title", ""),
         "key_requirements": meta.get("key_requirements", []),
-    }
+    }}
 
 # ── Resume PDF Generator ──────────────────────────────────────────────────────
+# Rendering is CPU-bound, so the API renders in a dedicated process pool with a
+# bounded queue, and caches finished PDFs by hash of the cleaned text.
+PDF_RENDER_WORKERS     = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+PDF_RENDER_MAX_QUEUE   = int(os.getenv("PDF_RENDER_MAX_QUEUE", "8"))
+PDF_RENDER_CACHE_BYTES = int(os.getenv("PDF_RENDER_CACHE_BYTES", str(32 * 1024 * 1024)))
+PDF_RENDER_CACHE_TTL   = float(os.getenv("PDF_RENDER_CACHE_TTL", "86400"))
+
+_render_pool     = None
+_render_inflight = 0
+_render_cache    = MemoryCache(max_bytes=PDF_RENDER_CACHE_BYTES, ttl=PDF_RENDER_CACHE_TTL)
+
+
+class RenderQueueFull(RuntimeError):
+    """Raised when PDF_RENDER_MAX_QUEUE renders are already in flight."""
+
+
+def clean_resume_markdown(text: str) -> str:
+    """Strip markdown the LLM might add (headings, bold/italics, quotes, HTML)."""
+    out = []
+    for line in text.splitlines():
+        line = re.sub(r'^#{1,4}\s*', '', line)
+        line = re.sub(r'\*{1,3}([^*\n]+)\*{1,3}', r'\1', line)
+        line = re.sub(r'_{1,2}([^_\n]+)_{1,2}', r'\1', line)
+        line = re.sub(r'^>\s*', '', line)
+        line = re.sub(r'<[^>]+>', '', line)
+        out.append(line)
+    return '\n'.join(out)
+
+
 def generate_resume_pdf(resume_text: str) -> bytes:
     """Convert plain resume text into a clean ATS-friendly black & white PDF."""
+    return _render_resume_pdf(parse_resume(clean_resume_markdown(resume_text)))
+
+
+async def render_resume_pdf(resume_text: str) -> bytes:
+    """generate_resume_pdf off the event loop, served from cache when possible."""
+    global _render_pool, _render_inflight
+    cleaned = clean_resume_markdown(resume_text)
+    key     = hashlib.sha256(cleaned.encode("utf-8")).hexdigest()
+    cached  = _render_cache.get(key)
+    if cached is not None:
+        return cached
+    if _render_inflight >= PDF_RENDER_MAX_QUEUE:
+        raise RenderQueueFull("PDF renderer is busy")
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(max_workers=PDF_RENDER_WORKERS,
+                                           mp_context=multiprocessing.get_context("spawn"))
+    parsed = parse_resume(cleaned)   # usually already parsed by the tailor that produced it
+    _render_inflight += 1
+    try:
+        pdf_bytes = await asyncio.get_running_loop().run_in_executor(
+            _render_pool, _render_resume_pdf, parsed)
+    finally:
+        _render_inflight -= 1
+    _render_cache.set(key, pdf_bytes)
+    return pdf_bytes
+
+
+def render_stats() -> dict:
+    return {"in_flight": _render_inflight, "max_queue": PDF_RENDER_MAX_QUEUE,
+            "workers": PDF_RENDER_WORKERS, "cache": _render_cache.stats()}
+
+
+def _render_resume_pdf(parsed: ParsedResume) -> bytes:
+    """Lay out a parsed, already-cleaned resume with ReportLab."""
     from reportlab.lib.pagesizes import letter
     from reportlab.lib.styles import ParagraphStyle
     from reportlab.lib.units import inch
@@ -424,21 +946,7 @@ def generate_resume_pdf(resume_text: str) -> bytes:
     from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer,
         HRFlowable, Table, TableStyle)
     from reportlab.lib.enums import TA_CENTER
-    import io, re
-
-    # ── Pre-process: strip markdown the LLM might add ────────────────────────
-    def clean_text(text):
-        out = []
-        for line in text.splitlines():
-            line = re.sub(r'^#{1,4}\s*', '', line)
-            line = re.sub(r'\*{1,3}([^*\n]+)\*{1,3}', r'\1', line)
-            line = re.sub(r'_{1,2}([^_\n]+)_{1,2}', r'\1', line)
-            line = re.sub(r'^>\s*', '', line)
-            line = re.sub(r'<[^>]+>', '', line)
-            out.append(line)
-        return '\n'.join(out)
-
-    resume_text = clean_text(resume_text)
+    import io
 
     buffer = io.BytesIO()
     BLACK  = colors.HexColor("#000000")
@@ -513,124 +1021,27 @@ def generate_resume_pdf(resume_text: str) -> bytes:
                         part.replace("&","&amp;").replace("<","&lt;").replace(">","&gt;"))
             return "".join(escaped)
         return t.replace("&","&amp;").replace("<","&lt;").replace(">","&gt;")
-    # ATS-priority ordered list
-    ATS_ORDER = [
-        "summary", "professional summary", "career summary", "executive summary",
-        "objective", "career objective", "profile", "professional profile", "about",
-        "experience", "work experience", "professional experience", "employment",
-        "work history", "career history", "employment history",
-        "education", "academic background", "academic credentials",
-        "skills", "technical skills", "core competencies", "competencies",
-        "technical expertise", "key skills", "areas of expertise",
-        "certifications", "certification", "certificates", "licenses",
-        "projects", "personal projects", "key projects", "notable projects",
-        "achievements", "accomplishments", "key achievements",
-        "awards", "honors", "honors & awards", "awards & honors",
-        "publications", "research",
-        "volunteer", "volunteer experience",
-        "languages", "interests", "hobbies",
-    ]
-
-    SECTION_TOKENS = {
-        "summary", "experience", "education", "skills", "projects",
-        "certifications", "certification", "certificates", "achievements",
-        "accomplishments", "awards", "honors", "publications", "volunteer",
-        "languages", "interests", "profile", "objective", "history",
-        "competencies", "expertise", "background", "credentials",
-        "employment", "career", "research", "licenses", "hobbies",
+    # ── Render section content ────────────────────────────────────────────────
+    line_styles = {
+        "title":   (job_title_style, False),
+        "company": (company_style, False),
+        "role":    (role_style, True),
+        "date":    (edu_meta_style, False),
+        "degree":  (edu_degree_style, False),
+        "text":    (body_style, True),
     }
 
-    def is_section(s):
-        stripped = s.strip().rstrip(":")
-        if not stripped or len(stripped) > 65:
-            return False
-        low = stripped.lower()
-        if stripped.isupper() and len(stripped) > 2:
-            return True
-        if low in ATS_ORDER:
-            return True
-        words = set(re.sub(r"[^a-z\s]", "", low).split())
-        if words & SECTION_TOKENS and len(stripped.split()) <= 5:
-            if not any(c in stripped for c in ["•", "@", ".", "http"]):
-                return True
-        return False
-
-    def ats_rank(key):
-        low = key.lower()
-        for rank, kw in enumerate(ATS_ORDER):
-            if low == kw or kw in low or low in kw:
-                return rank
-        return 999
-
-    def is_bullet(s):
-        return bool(re.match(r'^[•▪●\-–\*◦]\s', s))
-
-    def is_contact_line(s):
-        low = s.lower()
-        return any(x in low for x in ["@", "linkedin", "github", "http", "phone:"]) \
-            or bool(re.search(r"\d{3}[-.\s]\d{3}[-.\s]\d{4}", s)) \
-            or bool(re.search(r"\+\d[\d\s\(\)\-]{7,}", s))
-
-    def has_date(s):
-        return bool(re.search(
-            r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec|20\d{2}|19\d{2}|present|current)",
-            s.lower()))
-
-    # ── Parse header + sections ───────────────────────────────────────────────
-    raw_lines    = resume_text.strip().splitlines()
-    header_lines = []
-    body_start   = 0
-    for idx, line in enumerate(raw_lines):
-        if line.strip() and is_section(line.strip()):
-            body_start = idx
-            break
-        header_lines.append(line)
-
-    sections_list = []
-    cur_key = cur_label = None
-    cur_lines = []
-    for line in raw_lines[body_start:]:
-        s = line.strip()
-        if s and is_section(s):
-            if cur_key is not None:
-                sections_list.append((cur_key, cur_label, list(cur_lines)))
-            cur_key   = s.lower().rstrip(":").strip()
-            cur_label = s
-            cur_lines = []
-        else:
-            cur_lines.append(line)
-    if cur_key is not None:
-        sections_list.append((cur_key, cur_label, list(cur_lines)))
-
-    # Sort by ATS rank — unknown sections rank 999 and go last, never dropped
-    sections_list.sort(key=lambda x: ats_rank(x[0]))
-
-    # ── Render section content ────────────────────────────────────────────────
-    def render_lines(sec_lines, in_edu, in_skills, in_exp):
+    def render_lines(sec_lines):
         out = []
-        i = 0
-        lines = [l.strip() for l in sec_lines]
-
-        while i < len(lines):
-            s = lines[i]
-            i += 1
-            if not s:
+        for line in sec_lines:
+            if line.kind == "blank":
                 out.append(Spacer(1, 3))
-                continue
-
-            # Bullet point
-            if is_bullet(s):
-                text = re.sub(r"^[•▪●\-–\*◦]\s*", "", s)
-                out.append(Paragraph(f"<bullet>•</bullet> {safe(text, allow_bold=True)}", bullet_style))
-                continue
-
-            # Skills: "Label: value" two-column table
-            if in_skills and ":" in s:
-                parts = s.split(":", 1)
-                label = safe(parts[0].strip() + ":")
-                value = safe(parts[1].strip()) if len(parts) > 1 else ""
-                row = [[Paragraph(label, skill_label_style),
-                        Paragraph(value, skill_value_style)]]
+            elif line.kind == "bullet":
+                out.append(Paragraph(f"<bullet>•</bullet> {safe(line.text, allow_bold=True)}", bullet_style))
+            elif line.kind == "skill":
+                # Skills: "Label: value" two-column table
+                row = [[Paragraph(safe(line.text + ":"), skill_label_style),
+                        Paragraph(safe(line.value), skill_value_style)]]
                 t = Table(row, colWidths=[1.6*inch, 5.3*inch])
                 t.setStyle(TableStyle([
                     ("VALIGN",        (0,0),(-1,-1),"TOP"),
@@ -640,76 +1051,28 @@ def generate_resume_pdf(resume_text: str) -> bytes:
                     ("BOTTOMPADDING", (0,0),(-1,-1), 3),
                 ]))
                 out.append(t)
-                continue
-
-            # Education section
-            if in_edu:
-                if has_date(s) or "|" in s:
-                    out.append(Paragraph(safe(s), edu_meta_style))
-                else:
-                    out.append(Paragraph(safe(s), edu_degree_style))
-                continue
-
-            # Experience section — detect company vs role vs title
-            if in_exp:
-                # Format 1: "Job Title — Company | Location" (single line with em-dash)
-                if "—" in s or ("–" in s and not has_date(s)):
-                    out.append(Paragraph(safe(s), job_title_style))
-                    continue
-                # Format 2: next line is a role+date = this line is company
-                # Peek at next non-empty line
-                next_s = ""
-                for j in range(i, len(lines)):
-                    if lines[j]:
-                        next_s = lines[j]
-                        break
-                next_has_date = has_date(next_s)
-                next_is_bullet = is_bullet(next_s) if next_s else False
-                # This line = company if next line has a date (role+date line)
-                if next_has_date and not next_is_bullet and not has_date(s):
-                    out.append(Paragraph(safe(s), company_style))
-                    continue
-                # This line has a date = role/title with date
-                if has_date(s):
-                    out.append(Paragraph(safe(s, allow_bold=True), role_style))
-                    continue
-                # Default body
-                out.append(Paragraph(safe(s, allow_bold=True), body_style))
-                continue
-
-            # Default body
-            out.append(Paragraph(safe(s, allow_bold=True), body_style))
-
+            else:
+                style, allow_bold = line_styles[line.kind]
+                out.append(Paragraph(safe(line.text, allow_bold=allow_bold), style))
         return out
 
     # ── Assemble final document ───────────────────────────────────────────────
     story = []
-    first = True
-
-    for line in header_lines:
-        s = line.strip()
-        if not s:
-            continue
-        if first:
-            story.append(Paragraph(safe(s), name_style))
-            first = False
-        elif is_contact_line(s) or "|" in s:
-            story.append(Paragraph(safe(s), contact_style))
-        else:
-            story.append(Paragraph(safe(s, allow_bold=True), body_style))
+    header_styles = {"name": (name_style, False), "contact": (contact_style, False),
+                     "text": (body_style, True)}
+    for line in parsed.header:
+        style, allow_bold = header_styles[line.kind]
+        story.append(Paragraph(safe(line.text, allow_bold=allow_bold), style))
 
     story.append(HRFlowable(width="100%", thickness=1.5,
         color=BLACK, spaceAfter=8, spaceBefore=4))
 
-    for (key, label, sec_lines) in sections_list:
-        in_edu    = any(k in key for k in ["education","academic","credential"])
-        in_skills = any(k in key for k in ["skill","competenc","technolog","expertise"])
-        in_exp    = any(k in key for k in ["experience","employment","history","career"])
-
-        story.append(Paragraph(safe(label.upper()), section_style))
+    # Sorted by ATS rank — unknown sections rank 999 and go last, never dropped
+    for section in sorted(parsed.sections, key=lambda sec: sec.rank):
+        story.append(Paragraph(safe(section.label.upper()), section_style))
         story.append(HRFlowable(width="100%", thickness=0.6,
             color=RGRAY, spaceAfter=5, spaceBefore=2))
-        story.extend(render_lines(sec_lines, in_edu, in_skills, in_exp))
+        story.extend(render_lines(section.lines))
 
     doc.build(story)
     return buffer.getvalue()
@@ -0,0 +1,163 @@
+"""
+bench_analyze_output.py — Output tokens and latency of /analyze, old schema vs new
+The old schema asked the model to echo "resume_text"; the new one returns
+findings only. With GROQ_API_KEY set, both prompts are sent to Groq (cache
+bypassed) and real usage/latency is reported; otherwise output tokens are
+estimated locally and latency derived from a typical decode rate.
+Run from the repo root:  python benchmarks/bench_analyze_output.py [rounds]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analyzer
+from prompt_budget import count_tokens
+from llm_scheduler import get_scheduler
+
+DECODE_TOKENS_PER_SEC = float(os.getenv("DECODE_TOKENS_PER_SEC", "275"))   # estimate mode only
+
+OLD_SYSTEM = """You are an expert resume reviewer and career coach with 15 years of experience.
+Analyze the resume and return ONLY valid JSON with this exact structure:
+{
+  "overall_score": <integer 0-100>,
+  "resume_text": "<the full resume text>",
+  "scores": {
+    "clarity": <0-100>,
+    "impact": <0-100>,
+    "keywords": <0-100>,
+    "structure": <0-100>,
+    "ats_compatibility": <0-100>
+  },
+  "skills": {
+    "technical": ["skill1", "skill2"],
+    "soft": ["skill1", "skill2"]
+  },
+  "experience_years": <number>,
+  "education": "<highest degree and field>",
+  "strengths": ["strength1", "strength2", "strength3"],
+  "weaknesses": ["weakness1", "weakness2", "weakness3"],
+  "ats_issues": ["issue1", "issue2"],
+  "missing_sections": ["section1"],
+  "improvement_tips": [
+    {"area": "area name", "tip": "specific actionable tip"},
+    {"area": "area name", "tip": "specific actionable tip"},
+    {"area": "area name", "tip": "specific actionable tip"}
+  ],
+  "weak_bullets": ["bullet1", "bullet2", "bullet3"]
+}
+Be specific and actionable. Focus on real improvements."""
+
+RESUME = """Jane Doe
+jane.doe@example.com | (555) 123-4567 | linkedin.com/in/janedoe | Austin, TX
+
+PROFESSIONAL SUMMARY
+Backend engineer with 7 years building high-throughput Python and Go services on AWS.
+Led platform migrations, mentored engineers and cut infrastructure spend by 30%.
+
+EXPERIENCE
+Senior Software Engineer — Example Corp | 2020 – Present
+• Migrated 40 microservices from a monolith to Kubernetes on AWS, cutting deploy time 70%
+• Built REST APIs in Python and FastAPI serving 3M requests/day with p99 under 120ms
+• Designed Kafka and Spark pipelines feeding PostgreSQL and Redis for real-time analytics
+• Automated CI/CD with GitHub Actions and Terraform across 12 environments
+• Responsible for on-call rotation and incident reviews
+Software Engineer — Acme Logistics | 2017 – 2020
+• Developed route-optimization service in Go, reducing fuel costs 12%
+• Worked on internal dashboards using React and TypeScript
+• Helped with database migrations from MySQL to PostgreSQL
+• Wrote unit and integration tests, raising coverage from 40% to 85%
+
+PROJECTS
+OpenTrace — distributed tracing toolkit
+• Python library with 1.2k GitHub stars; OpenTelemetry exporters for Kafka and Redis
+ResumeBot
+• LLM-powered resume reviewer built with FastAPI and Groq
+
+TECHNICAL SKILLS
+Languages: Python, Go, TypeScript, SQL
+Cloud & Infra: AWS (ECS, Lambda, S3, RDS), Kubernetes, Docker, Terraform
+Data: PostgreSQL, Redis, Kafka, Spark, Airflow
+Practices: CI/CD, TDD, Agile, Observability
+
+EDUCATION
+B.S. Computer Science — University of Texas at Austin | 2017
+
+CERTIFICATIONS
+AWS Certified Solutions Architect – Associate"""
+
+# A typical findings-only response, used to estimate output size offline
+SAMPLE_FINDINGS = {
+    "overall_score": 78,
+    "scores": {"clarity": 80, "impact": 75, "keywords": 82, "structure": 78, "ats_compatibility": 76},
+    "skills": {"technical": ["Python", "Go", "AWS", "Kubernetes", "Docker", "Terraform", "Kafka",
+                             "PostgreSQL", "Redis", "FastAPI", "React", "TypeScript"],
+               "soft": ["Mentoring", "Incident management", "Cross-team collaboration"]},
+    "experience_years": 7,
+    "education": "B.S. Computer Science",
+    "strengths": ["Quantified impact on most experience bullets",
+                  "Strong cloud and data platform keyword coverage",
+                  "Clear progression from engineer to senior engineer"],
+    "weaknesses": ["Several bullets describe duties rather than results",
+                   "Projects lack dates and links",
+                   "Summary is generic about target role"],
+    "ats_issues": ["Em dashes in job headers may confuse some parsers",
+                   "Contact line uses pipes instead of separate lines"],
+    "improvement_tips": [
+        {"area": "Impact", "tip": "Rewrite duty bullets as outcomes with metrics, e.g. on-call MTTR."},
+        {"area": "Projects", "tip": "Add repository links and dates to each project."},
+        {"area": "Summary", "tip": "Name the target role and two signature achievements."}],
+    "weak_bullets": ["• Responsible for on-call rotation and incident reviews",
+                     "• Worked on internal dashboards using React and TypeScript",
+                     "• Helped with database migrations from MySQL to PostgreSQL"],
+}
+
+
+def estimate():
+    new_out = json.dumps(SAMPLE_FINDINGS, indent=2)
+    old_out = json.dumps({"overall_score": SAMPLE_FINDINGS["overall_score"], "resume_text": RESUME,
+                          **SAMPLE_FINDINGS, "missing_sections": []}, indent=2)
+    old_tokens, new_tokens = count_tokens(old_out), count_tokens(new_out)
+    print(f"estimated (no GROQ_API_KEY; decode at {DECODE_TOKENS_PER_SEC:.0f} tok/s)")
+    print(f"{'schema':>6}  {'out tokens':>10}  {'decode s':>8}")
+    for name, tokens in (("old", old_tokens), ("new", new_tokens)):
+        print(f"{name:>6}  {tokens:>10}  {tokens / DECODE_TOKENS_PER_SEC:>8.2f}")
+    print(f"saved {old_tokens - new_tokens} output tokens ({1 - new_tokens / old_tokens:.0%})")
+
+
+async def live(rounds: int):
+    """Same client and rate-limit scheduler the API uses, so a 429 retries instead of failing."""
+    create = analyzer.get_async_client().chat.completions.with_raw_response.create
+    user   = f"Analyze this resume:\n\n{RESUME}"
+    print(f"live against {analyzer.MODEL}, {rounds} round(s) each")
+    print(f"{'schema':>6}  {'out tokens':>10}  {'latency s':>9}  {'truncated':>9}")
+    for name, system, max_tokens in (("old", OLD_SYSTEM, 2048),
+                                     ("new", analyzer.ANALYZE_SYSTEM, analyzer.ANALYZE_MAX_TOKENS)):
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+        tokens = latency = truncated = 0
+        for _ in range(rounds):
+            start    = time.perf_counter()
+            response = await get_scheduler().run(
+                lambda: create(model=analyzer.MODEL, messages=messages,
+                               temperature=analyzer.TEMPERATURE, max_tokens=max_tokens),
+                count_tokens(system) + count_tokens(user), max_tokens)
+            latency   += time.perf_counter() - start
+            tokens    += response.usage.completion_tokens
+            truncated += response.choices[0].finish_reason == "length"
+        print(f"{name:>6}  {tokens / rounds:>10.0f}  {latency / rounds:>9.2f}  {truncated:>9}")
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    if os.getenv("GROQ_API_KEY"):
+        asyncio.run(live(rounds))
+    else:
+        estimate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+bench_bold_keywords.py — Per-line cost of keyword bolding on a 2-page resume
+Compares the old per-section alternation regex with the memoized trie matcher.
+Run from the repo root:  python benchmarks/bench_bold_keywords.py
+"""
+
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analyzer
+
+KEYWORDS = [
+    "Python", "Java", "JavaScript", "TypeScript", "Go", "AWS", "Azure", "GCP",
+    "Docker", "Kubernetes", "Terraform", "CI/CD", "Jenkins", "GitHub Actions",
+    "REST APIs", "GraphQL", "PostgreSQL", "MySQL", "Redis", "Kafka", "Spark",
+    "Airflow", "React", "Node.js", "Microservices", "Infrastructure as Code",
+    "Machine Learning", "PyTorch", "Agile", "Linux",
+]
+
+BULLETS = [
+    "• Migrated 40 microservices from a monolith to Kubernetes on AWS, cutting deploy time 70%",
+    "• Built REST APIs in Python and Node.js serving 3M requests/day with p99 under 120ms",
+    "• Automated CI/CD with Jenkins and GitHub Actions; Terraform for infrastructure as code",
+    "• Designed Kafka and Spark pipelines feeding PostgreSQL and Redis for real-time analytics",
+    "• Led an agile team of 6 engineers delivering React and TypeScript dashboards",
+    "• Trained PyTorch machine learning models and deployed them behind GraphQL gateways",
+]
+
+
+def make_resume(lines: int = 110) -> str:
+    out = []
+    for i in range(lines):
+        if i % 8 == 0:
+            out.append("Senior Software Engineer — Example Corp | 2019 – Present")
+        else:
+            out.append(BULLETS[i % len(BULLETS)])
+    return "\n".join(out)
+
+
+def old_bold_keywords_in_text(text, keywords):
+    """The previous implementation: pattern rebuilt on every call."""
+    if not keywords:
+        return text
+    kws_sorted = sorted(keywords, key=len, reverse=True)
+    escaped    = [re.escape(k) for k in kws_sorted]
+    pattern    = re.compile(r'(?<!\*)(' + '|'.join(escaped) + r')(?!\*)', re.IGNORECASE)
+
+    def replacer(m):
+        return f"**{m.group(1)}**"
+
+    result_lines = []
+    lines = text.splitlines()
+    for idx, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            result_lines.append(line)
+            continue
+        is_bullet      = stripped.startswith(("•", "▪", "●", "-", "–", "◦"))
+        is_body        = len(stripped) > 30 and not stripped.isupper()
+        next_stripped  = lines[idx+1].strip() if idx+1 < len(lines) else ""
+        next_is_bullet = next_stripped.startswith(("•", "▪", "●", "-", "–", "◦", "Technologies"))
+        is_project_name = (not is_bullet and not stripped.isupper()
+                           and len(stripped) < 80 and next_is_bullet)
+        if is_bullet or is_body or is_project_name:
+            line = pattern.sub(replacer, line)
+        result_lines.append(line)
+    return "\n".join(result_lines)
+
+
+def bench(fn, text: str, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(text, KEYWORDS)
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    text   = make_resume()
+    lines  = len(text.splitlines())
+    rounds = 300
+    assert old_bold_keywords_in_text(text, KEYWORDS) == analyzer.bold_keywords_in_text(text, KEYWORDS)
+
+    old_warm = bench(old_bold_keywords_in_text, text, rounds)
+    new_warm = bench(analyzer.bold_keywords_in_text, text, rounds)
+
+    # Cold: fresh keyword sets each round, so neither re's cache nor ours helps
+    def cold(fn):
+        start = time.perf_counter()
+        for i in range(rounds):
+            fn(text, KEYWORDS + [f"unique-term-{i}"])
+        return (time.perf_counter() - start) / rounds
+    re.purge()
+    old_cold = cold(old_bold_keywords_in_text)
+    new_cold = cold(analyzer.bold_keywords_in_text)
+
+    print(f"{lines} lines, {len(KEYWORDS)} keywords, {rounds} rounds")
+    print(f"{'':>12}  {'old us/line':>11}  {'trie us/line':>12}")
+    print(f"{'warm cache':>12}  {old_warm / lines * 1e6:>11.2f}  {new_warm / lines * 1e6:>12.2f}")
+    print(f"{'new keywords':>12}  {old_cold / lines * 1e6:>11.2f}  {new_cold / lines * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
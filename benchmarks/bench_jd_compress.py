@@ -0,0 +1,95 @@
+"""
+bench_jd_compress.py — Job description boilerplate stripping: savings and safety
+Reports tokens saved on a typical posting, and checks that postings whose job
+title reads like a boilerplate heading (benefits, diversity, accommodations
+roles) keep their content instead of being stripped to nothing.
+Run from the repo root:  python benchmarks/bench_jd_compress.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompt_budget import compress_job_description, count_tokens, fit
+
+TYPICAL = """Senior Backend Engineer
+About the role
+You will design and run the Python services behind our payments platform.
+
+Responsibilities
+- Build FastAPI services on AWS with PostgreSQL and Redis
+- Own on-call for the services you ship
+
+Requirements
+- 5+ years of Python
+- Experience with Kubernetes and Terraform
+
+Benefits
+- Medical, dental and vision insurance
+- 401(k) with 4% match
+- Unlimited paid time off
+
+Equal Opportunity Employer
+We are an equal opportunity employer and make hiring decisions without regard to
+race, religion, sexual orientation, gender identity or protected veteran status.
+"""
+
+BENEFITS_ANALYST = """Benefits Analyst
+Join our People team to run health and retirement plans for 4,000 employees.
+You will audit carrier invoices, manage open enrollment and answer employee questions.
+
+Requirements
+- 3 years in benefits administration
+- Strong Excel and Workday skills
+"""
+
+COMP_MANAGER = """Compensation and Benefits Manager
+Lead salary benchmarking, bonus plans and annual benefits renewals.
+Partner with Finance on budget modelling and with HR business partners on offers.
+
+Qualifications
+- 7+ years in total rewards
+- CCP or CBP certification preferred
+"""
+
+HR_ROLES = """Accommodations Coordinator
+Coordinate workplace adjustments for employees and candidates, working with managers and medical providers.
+Track cases in ServiceNow and report on turnaround times.
+
+Diversity Recruiter
+Source and engage candidates from underrepresented groups for engineering roles.
+Run campus partnerships and measure funnel conversion by channel.
+"""
+
+# (name, posting, phrases that must survive compression)
+CASES = [
+    ("typical",           TYPICAL,          ["FastAPI services", "5+ years of Python"]),
+    ("benefits analyst",  BENEFITS_ANALYST, ["audit carrier invoices", "Workday"]),
+    ("comp & benefits",   COMP_MANAGER,     ["salary benchmarking", "CCP or CBP"]),
+    ("hr coordinator",    HR_ROLES,         ["workplace adjustments", "campus partnerships"]),
+]
+
+
+def main():
+    print(f"{'posting':>16}  {'tokens':>6}  {'kept':>6}  {'saved':>6}  {'us/call':>8}")
+    for name, text, must_keep in CASES:
+        compressed = compress_job_description(text)
+        missing    = [p for p in must_keep if p not in compressed]
+        assert not missing, f"{name}: compression dropped {missing}"
+        _, job = fit("match", resume="x", job=text)
+        assert job.strip(), f"{name}: fit() produced an empty job description"
+        compress_job_description.cache_clear()
+        start = time.perf_counter()
+        for _ in range(200):
+            compress_job_description.__wrapped__(text)
+        per_call = (time.perf_counter() - start) / 200
+        before, after = count_tokens(text), count_tokens(compressed)
+        print(f"{name:>16}  {before:>6}  {after:>6}  {1 - after / before:>6.0%}  {per_call * 1e6:>8.0f}")
+    typical_saved = 1 - count_tokens(compress_job_description(TYPICAL)) / count_tokens(TYPICAL)
+    assert typical_saved > 0.2, "boilerplate was not stripped from the typical posting"
+
+
+if __name__ == "__main__":
+    main()
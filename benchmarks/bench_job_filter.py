@@ -0,0 +1,62 @@
+"""
+bench_job_filter.py — Exclusion filter over a few thousand synthetic listings
+Compares per-job substring scans (the old is_excluded) with filter_listings.
+Run from the repo root:  python benchmarks/bench_job_filter.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import job_search
+
+FILLER = ("we are hiring a software engineer to build scalable python services on aws "
+          "with docker kubernetes and react you will collaborate with product and design "
+          "competitive salary health benefits remote friendly team").split()
+
+
+def make_listings(n: int, seed: int = 7) -> list[dict]:
+    rng      = random.Random(seed)
+    phrases  = sorted(job_search.DEFAULT_EXCLUDE_PHRASES)
+    listings = []
+    for i in range(n):
+        words = rng.choices(FILLER, k=60)
+        if rng.random() < 0.15:
+            words.insert(rng.randrange(len(words)), rng.choice(phrases))
+        listings.append({"title": f"Engineer {i}", "description": " ".join(words)})
+    return listings
+
+
+def old_filter(listings: list[dict]) -> list[bool]:
+    phrases = list(job_search.DEFAULT_EXCLUDE_PHRASES)
+
+    def is_excluded(title, description):
+        text = (title + " " + description).lower()
+        return any(phrase in text for phrase in phrases)
+
+    return [not is_excluded(j.get("title", ""), j.get("description", "")) for j in listings]
+
+
+def bench(fn, listings: list[dict], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(listings)
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    print(f"{'listings':>8}  {'old ms':>8}  {'new ms':>8}  {'kept':>6}")
+    for n in (500, 2000, 5000):
+        listings = make_listings(n)
+        assert old_filter(listings) == job_search.filter_listings(listings)
+        old = bench(old_filter, listings, 20)
+        new = bench(job_search.filter_listings, listings, 20)
+        kept = sum(job_search.filter_listings(listings))
+        print(f"{n:>8}  {old * 1000:>8.2f}  {new * 1000:>8.2f}  {kept:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+bench_json_repair.py — Truncated model output: repair safety and speed
+Cuts QuestionSet and RewriteResult payloads at every character offset (as
+max_tokens would) and checks that repair either fails cleanly or returns a
+prefix of the complete items — never a half-filled question or rewrite.
+Run from the repo root:  python benchmarks/bench_json_repair.py
+"""
+
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_json import parse_json, QuestionSet, RewriteResult
+
+QUESTIONS = {"questions": [
+    {"category": "Technical", "question": "How would you shard a \"hot\" Postgres table?",
+     "ideal_answer": "Pick a shard key with even spread, e.g. tenant_id; backfill, then dual-write.",
+     "tip": "Mention rebalancing."},
+    {"category": "Behavioral", "question": "Tell me about an outage you owned.",
+     "ideal_answer": "STAR: paged at 2am, rolled back in 10 min, wrote the postmortem.",
+     "tip": "Quantify impact: 99.95% → 99.99%."},
+    {"category": "System Design", "question": "Design a rate limiter for 10k RPS.",
+     "ideal_answer": "Token bucket per key in Redis, Lua script for atomic take, local cache.",
+     "tip": "Discuss [burst] vs {sustained} limits."},
+]}
+
+REWRITES = {"rewrites": [
+    {"original": "• Responsible for on-call rotation",
+     "improved": "• Cut pager alerts 40% by tuning 120 noisy monitors",
+     "reason": "Leads with a measurable outcome."},
+    {"original": "• Worked on dashboards using React",
+     "improved": "• Shipped 6 React dashboards used daily by 200 ops staff",
+     "reason": "Adds scope and users."},
+]}
+
+# (name, schema, payload, list field)
+CASES = [
+    ("questions", QuestionSet,   QUESTIONS, "questions"),
+    ("rewrites",  RewriteResult, REWRITES,  "rewrites"),
+]
+
+
+def check(schema, payload: dict, field: str, indent) -> tuple[int, int, float]:
+    """Parse every prefix of the serialized payload: (repaired, failed, seconds)."""
+    full     = schema.model_validate(payload).model_dump()[field]
+    text     = json.dumps(payload, indent=indent, ensure_ascii=False)
+    repaired = failed = 0
+    start    = time.perf_counter()
+    for cut in range(len(text)):
+        try:
+            items = parse_json(text[:cut], schema)[field]
+        except ValueError:
+            failed += 1
+            continue
+        assert items == full[:len(items)], f"{field}: partial item at offset {cut}: {items[-1]}"
+        repaired += 1
+    assert parse_json(text, schema)[field] == full
+    return repaired, failed, time.perf_counter() - start
+
+
+def main():
+    print(f"{'payload':>10}  {'indent':>6}  {'cuts':>5}  {'repaired':>8}  {'failed':>6}  {'us/parse':>8}")
+    for name, schema, payload, field in CASES:
+        for indent in (None, 2):
+            repaired, failed, seconds = check(schema, payload, field, indent)
+            cuts = repaired + failed
+            print(f"{name:>10}  {str(indent):>6}  {cuts:>5}  {repaired:>8}  {failed:>6}  "
+                  f"{seconds / cuts * 1e6:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
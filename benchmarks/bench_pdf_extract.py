@@ -0,0 +1,56 @@
+"""
+bench_pdf_extract.py — Inline vs process-pool PDF text extraction
+Run from the repo root:  python benchmarks/bench_pdf_extract.py
+"""
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+import analyzer
+
+LINE = "• Designed and shipped distributed Python services on AWS handling 2M requests/day"
+
+
+def make_pdf(pages: int) -> bytes:
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    for p in range(pages):
+        y = 750
+        for i in range(60):
+            c.drawString(40, y, f"{p}.{i} {LINE}")
+            y -= 12
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def bench(file_bytes: bytes, parallel: bool, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        analyzer.parse_pdf_text(file_bytes, parallel=parallel)
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    # Spawn the workers up front so pool start-up is not billed to the first run
+    analyzer.parse_pdf_text(make_pdf(2), parallel=True)
+    print(f"workers={analyzer.PDF_WORKERS}")
+    print(f"{'pages':>5}  {'inline ms':>10}  {'pool ms':>10}  {'inline pg/s':>11}  {'pool pg/s':>10}")
+    for pages in (1, 5, 20):
+        pdf    = make_pdf(pages)
+        rounds = 10 if pages < 20 else 5
+        inline = bench(pdf, False, rounds)
+        pooled = bench(pdf, True, rounds)
+        print(f"{pages:>5}  {inline * 1000:>10.1f}  {pooled * 1000:>10.1f}  "
+              f"{pages / inline:>11.1f}  {pages / pooled:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+bulk_jobs.py — Bulk resume analysis queue persisted in SQLite
+POST /analyze/bulk stores every PDF as a pending item; in-process asyncio
+workers claim items under a lease, analyze them and write results back, so a
+restart (or a second uvicorn worker) picks up where the batch left off.
+Calls run at bulk priority in the LLM scheduler, behind interactive requests; a
+429 that outlasts the scheduler's retries pauses every worker instead of
+failing items.
+"""
+
+import io
+import os
+import json
+import time
+import uuid
+import random
+import sqlite3
+import zipfile
+import asyncio
+import threading
+from groq import RateLimitError
+from analyzer import parse_pdf_text, analyze_resume
+from llm_scheduler import BULK, priority
+
+BULK_DB_PATH       = os.getenv("BULK_DB_PATH", "bulk_jobs.sqlite3")
+BULK_CONCURRENCY   = int(os.getenv("BULK_CONCURRENCY", "4"))
+BULK_MAX_FILES     = int(os.getenv("BULK_MAX_FILES", "500"))
+BULK_MAX_ATTEMPTS  = int(os.getenv("BULK_MAX_ATTEMPTS", "3"))
+BULK_LEASE_SECONDS = float(os.getenv("BULK_LEASE_SECONDS", "120"))   # a crashed worker's item is reclaimed after this
+BULK_MAX_BACKOFF   = float(os.getenv("BULK_MAX_BACKOFF", "60"))
+BULK_POLL_SECONDS  = 2.0
+
+MAX_PDF_BYTES    = 10 * 1024 * 1024
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+UPLOAD_CHUNK     = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bulk_jobs (
+    id          TEXT PRIMARY KEY,
+    total       INTEGER NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bulk_items (
+    seq         INTEGER PRIMARY KEY,
+    job_id      TEXT NOT NULL,
+    idx         INTEGER NOT NULL,
+    filename    TEXT NOT NULL,
+    pdf         BLOB,
+    status      TEXT NOT NULL DEFAULT 'pending',   -- pending | running | done | error
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    result      TEXT,
+    error       TEXT,
+    updated_at  REAL NOT NULL,
+    UNIQUE (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS bulk_items_status ON bulk_items(status, seq);
+"""
+
+
+class BulkStore:
+    def __init__(self, path: str = BULK_DB_PATH):
+        self.path  = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def create_job(self, pdfs: list[tuple[str, bytes]]) -> str:
+        job_id = uuid.uuid4().hex
+        now    = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO bulk_jobs (id, total, created_at) VALUES (?, ?, ?)",
+                               (job_id, len(pdfs), now))
+            self._conn.executemany(
+                "INSERT INTO bulk_items (job_id, idx, filename, pdf, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, i, name, data, now) for i, (name, data) in enumerate(pdfs)])
+        return job_id
+
+    def claim(self):
+        """Atomically take the oldest pending (or lease-expired) item: (job_id, idx, pdf, lease) or None.
+
+        lease (the item's lease_until) identifies this claim: complete, fail and
+        release only apply while it still matches, so a worker whose lease ran
+        out and was reclaimed can't overwrite the new owner's outcome.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE bulk_items SET status = 'running', attempts = attempts + 1, "
+                "lease_until = ?, updated_at = ? WHERE seq = ("
+                "  SELECT seq FROM bulk_items WHERE status = 'pending' "
+                "  OR (status = 'running' AND lease_until < ?) ORDER BY seq LIMIT 1) "
+                "RETURNING job_id, idx, pdf, lease_until",
+                (now + BULK_LEASE_SECONDS, now, now)).fetchone()
+
+    def complete(self, job_id: str, idx: int, lease: float, result: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE bulk_items SET status = 'done', result = ?, pdf = NULL, updated_at = ? "
+                "WHERE job_id = ? AND idx = ? AND status = 'running' AND lease_until = ?",
+                (json.dumps(result), time.time(), job_id, idx, lease))
+
+    def fail(self, job_id: str, idx: int, lease: float, error: str, retry: bool):
+        """Back to pending while attempts remain (and retry is allowed), else a final error."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE bulk_items SET "
+                "status = CASE WHEN ? AND attempts < ? THEN 'pending' ELSE 'error' END, "
+                "pdf = CASE WHEN ? AND attempts < ? THEN pdf ELSE NULL END, "
+                "error = ?, lease_until = 0, updated_at = ? "
+                "WHERE job_id = ? AND idx = ? AND status = 'running' AND lease_until = ?",
+                (retry, BULK_MAX_ATTEMPTS, retry, BULK_MAX_ATTEMPTS, error, time.time(),
+                 job_id, idx, lease))
+
+    def release(self, job_id: str, idx: int, lease: float):
+        """Return an item untouched (rate limited or shutting down) without using an attempt."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE bulk_items SET status = 'pending', attempts = attempts - 1, lease_until = 0, "
+                "updated_at = ? WHERE job_id = ? AND idx = ? AND status = 'running' "
+                "AND lease_until = ?", (time.time(), job_id, idx, lease))
+
+    def get_job(self, job_id: str, offset: int = 0, limit: int = 100) -> dict | None:
+        with self._lock:
+            job = self._conn.execute(
+                "SELECT total, created_at FROM bulk_jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM bulk_items WHERE job_id = ? GROUP BY status",
+                (job_id,)).fetchall())
+            rows = self._conn.execute(
+                "SELECT idx, filename, status, result, error FROM bulk_items WHERE job_id = ? "
+                "ORDER BY idx LIMIT ? OFFSET ?", (job_id, max(0, limit), max(0, offset))).fetchall()
+        total, created_at = job
+        finished = counts.get("done", 0) + counts.get("error", 0)
+        status   = ("done" if finished == total else
+                    "running" if finished or counts.get("running") else "queued")
+        items = []
+        for idx, filename, item_status, result, error in rows:
+            item = {"index": idx, "filename": filename, "status": item_status}
+            if item_status == "done":
+                item["result"] = json.loads(result)
+            elif item_status == "error":
+                item["error"] = error
+            items.append(item)
+        return {
+            "id":         job_id,
+            "status":     status,
+            "total":      total,
+            "done":       counts.get("done", 0),
+            "failed":     counts.get("error", 0),
+            "pending":    counts.get("pending", 0) + counts.get("running", 0),
+            "created_at": created_at,
+            "offset":     offset,
+            "results":    items,
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM bulk_items GROUP BY status").fetchall())
+        return {"path": self.path, "items": counts}
+
+
+# ── Upload unpacking ──────────────────────────────────────────────────────────
+async def read_uploads(files) -> list[tuple[str, bytes]]:
+    """(filename, bytes) per UploadFile, read in chunks so oversized input is refused early."""
+    uploads, total = [], 0
+    for upload in files:
+        name  = upload.filename or ""
+        limit = MAX_PDF_BYTES if name.lower().endswith(".pdf") else MAX_UPLOAD_BYTES
+        if upload.size is not None and upload.size > limit:
+            raise ValueError(f"{name} is too large. Max 10MB per PDF.")
+        chunks, size = [], 0
+        while chunk := await upload.read(UPLOAD_CHUNK):
+            size  += len(chunk)
+            total += len(chunk)
+            if size > limit:
+                raise ValueError(f"{name} is too large. Max 10MB per PDF.")
+            if total > MAX_UPLOAD_BYTES:
+                raise ValueError("Upload too large. Max 512MB per batch.")
+            chunks.append(chunk)
+        uploads.append((name, b"".join(chunks)))
+    return uploads
+
+
+def collect_pdfs(uploads: list[tuple[str, bytes]]) -> list[tuple[str, bytes]]:
+    """PDFs from uploaded files, expanding zips. Raises ValueError on bad input."""
+    pdfs, total_bytes = [], 0
+
+    def add(name, data):
+        nonlocal total_bytes
+        if len(data) > MAX_PDF_BYTES:
+            raise ValueError(f"{name} is too large. Max 10MB per PDF.")
+        total_bytes += len(data)
+        if total_bytes > MAX_UPLOAD_BYTES:
+            raise ValueError("Upload too large. Max 512MB per batch.")
+        if len(pdfs) >= BULK_MAX_FILES:
+            raise ValueError(f"Too many resumes. Max {BULK_MAX_FILES} per batch.")
+        pdfs.append((name, data))
+
+    for name, data in uploads:
+        low = (name or "").lower()
+        if low.endswith(".pdf"):
+            add(name, data)
+        elif low.endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(io.BytesIO(data))
+            except zipfile.BadZipFile:
+                raise ValueError(f"{name} is not a valid zip file.")
+            with archive:
+                for info in archive.infolist():
+                    member = info.filename
+                    if (info.is_dir() or not member.lower().endswith(".pdf")
+                            or member.startswith("__MACOSX/")):
+                        continue
+                    if info.file_size > MAX_PDF_BYTES:
+                        raise ValueError(f"{member} is too large. Max 10MB per PDF.")
+                    add(os.path.basename(member), archive.read(info))
+        else:
+            raise ValueError(f"{name}: only PDF or zip files accepted.")
+    if not pdfs:
+        raise ValueError("No PDF files found in the upload.")
+    return pdfs
+
+
+# ── Workers ───────────────────────────────────────────────────────────────────
+_store        = None
+_store_lock   = threading.Lock()
+_workers      = []
+_wake         = None     # asyncio.Event set when new items arrive
+_paused_until = 0.0      # shared Groq 429 backoff
+_rate_limits  = 0        # consecutive 429s, drives the backoff
+_stats        = {"processed": 0, "failed": 0, "rate_limited": 0}
+
+
+def get_store() -> BulkStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BulkStore()
+        return _store
+
+
+def _backoff_after(error: RateLimitError) -> float:
+    """Honor Retry-After when Groq sends one, else exponential with jitter."""
+    global _rate_limits
+    _rate_limits += 1
+    retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+    try:
+        delay = float(retry_after)
+    except (TypeError, ValueError):
+        delay = min(BULK_MAX_BACKOFF, 2 ** _rate_limits) * random.uniform(0.5, 1.0)
+    return min(BULK_MAX_BACKOFF, delay)
+
+
+async def _process(job_id: str, idx: int, pdf: bytes, lease: float):
+    global _paused_until, _rate_limits
+    store = get_store()
+    try:
+        # Not load_resume: a batch would evict interactive users from the resume cache
+        resume_text = await asyncio.to_thread(parse_pdf_text, pdf)
+    except Exception:
+        resume_text = ""
+    if not resume_text.strip():              # unreadable PDFs won't improve on retry
+        await asyncio.to_thread(store.fail, job_id, idx, lease, "Could not extract text from PDF.", False)
+        _stats["failed"] += 1
+        return
+    try:
+        result = await analyze_resume(resume_text)
+    except RateLimitError as e:
+        _stats["rate_limited"] += 1
+        _paused_until = max(_paused_until, time.time() + _backoff_after(e))
+        await asyncio.to_thread(store.release, job_id, idx, lease)
+        return
+    except Exception as e:
+        await asyncio.to_thread(store.fail, job_id, idx, lease, f"Analysis failed: {str(e)}", True)
+        _stats["failed"] += 1
+        return
+    _rate_limits = 0
+    result.pop("resume_text", None)          # not stored: results hold the analysis only
+    await asyncio.to_thread(store.complete, job_id, idx, lease, result)
+    _stats["processed"] += 1
+
+
+async def _worker():
+    priority.set(BULK)                       # task-local: interactive calls go first
+    store = get_store()
+    while True:
+        delay = _paused_until - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay + random.uniform(0, 0.5))   # don't all resume at once
+            continue
+        item = await asyncio.to_thread(store.claim)
+        if item is None:
+            _wake.clear()
+            try:
+                await asyncio.wait_for(_wake.wait(), BULK_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        job_id, idx, pdf, lease = item
+        try:
+            await _process(job_id, idx, pdf, lease)
+        except asyncio.CancelledError:
+            store.release(job_id, idx, lease)       # shutting down: hand it to the next process
+            raise
+
+
+def start_workers(concurrency: int | None = None):
+    """Start the worker tasks on the running loop (idempotent); pending items resume."""
+    global _wake
+    if _workers and not all(w.done() for w in _workers):
+        return
+    _wake = asyncio.Event()
+    _workers[:] = [asyncio.ensure_future(_worker())
+                   for _ in range(max(1, concurrency or BULK_CONCURRENCY))]
+
+
+async def stop_workers():
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+async def submit(pdfs: list[tuple[str, bytes]]) -> str:
+    job_id = await asyncio.to_thread(get_store().create_job, pdfs)
+    start_workers()
+    _wake.set()
+    return job_id
+
+
+def bulk_stats() -> dict:
+    return {**_stats, "workers": len(_workers), "concurrency": BULK_CONCURRENCY,
+            "paused_for": max(0.0, round(_paused_until - time.time(), 1)),
+            **get_store().stats()}
@@ -0,0 +1,312 @@
+"""
+job_search.py — Adzuna proxy with a pooled async client, TTL cache and coalescing
+Identical searches (same normalized query + page) are served from cache, and
+concurrent identical searches share a single upstream fetch. Every upstream
+page is also written to the local job store (job_store.py) for /jobs/local.
+ADZUNA_BASE_URL can point at a local stub server for testing.
+"""
+
+import os
+import json
+import time
+import bisect
+import sqlite3
+import asyncio
+import functools
+import httpx
+from collections import OrderedDict, deque
+from llm_cache import MemoryCache
+from job_store import JOB_STORE_MAX_AGE, get_store
+
+ADZUNA_BASE_URL        = os.getenv("ADZUNA_BASE_URL", "https://api.adzuna.com/v1/api/jobs")
+ADZUNA_TIMEOUT         = float(os.getenv("ADZUNA_TIMEOUT", "10"))
+ADZUNA_MAX_CONNECTIONS = int(os.getenv("ADZUNA_MAX_CONNECTIONS", "20"))
+JOB_CACHE_TTL          = float(os.getenv("JOB_CACHE_TTL", "600"))
+JOB_CACHE_MAX_BYTES    = int(os.getenv("JOB_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Next-page prefetch: each client gets JOB_PREFETCH_PER_MINUTE background fetches,
+# and at most JOB_PREFETCH_MAX_INFLIGHT run at once across all clients.
+JOB_PREFETCH_PER_MINUTE   = int(os.getenv("JOB_PREFETCH_PER_MINUTE", "10"))
+JOB_PREFETCH_MAX_INFLIGHT = int(os.getenv("JOB_PREFETCH_MAX_INFLIGHT", "4"))
+JOB_PREFETCH_MAX_CLIENTS  = 4096
+
+_client      = None
+_client_loop = None
+_cache       = MemoryCache(max_bytes=JOB_CACHE_MAX_BYTES, ttl=JOB_CACHE_TTL)
+_inflight    = {}   # cache key -> asyncio.Task fetching it
+_stats       = {"upstream_fetches": 0, "coalesced": 0,
+                "prefetched": 0, "prefetch_hits": 0, "prefetch_skipped": 0,
+                "store_syncs": 0, "store_errors": 0}
+
+_prefetch_budget = OrderedDict()   # client id -> deque of recent prefetch times
+_prefetched_keys = set()           # cached pages that came from a prefetch
+_prefetch_tasks  = set()
+_record_tasks    = {}              # cache key -> background store upsert of that page
+
+
+# Listings requiring US citizenship, clearance, etc. are hidden by default
+DEFAULT_EXCLUDE_PHRASES = frozenset([
+    "us citizen", "u.s. citizen", "united states citizen",
+    "must be a citizen", "citizenship required", "citizenship is required",
+    "security clearance", "secret clearance", "top secret", "ts/sci",
+    "active clearance", "clearance required", "dod clearance",
+    "us persons only", "u.s. persons only",
+    "itar", "export control", "must hold us",
+])
+
+
+class CredentialsMissing(RuntimeError):
+    """ADZUNA_APP_ID / ADZUNA_APP_KEY are not configured."""
+
+
+def build_query(keywords: str = "", location: str = "", results_per_page: int = 12,
+                sort_by: str = "", full_time: int = 0, salary_min: int = 0) -> dict:
+    """Adzuna query params (minus credentials), normalized so equivalent searches share a key."""
+    query = {"results_per_page": results_per_page}
+    keywords = " ".join(keywords.lower().split())
+    location = " ".join(location.lower().split())
+    if keywords:        query["what"]       = keywords
+    if location:        query["where"]      = location
+    if sort_by:         query["sort_by"]    = sort_by
+    if full_time:       query["full_time"]  = 1
+    if salary_min > 0:  query["salary_min"] = salary_min
+    return query
+
+
+def cache_key(country: str, page: int, query: dict) -> str:
+    return json.dumps([country.lower(), page, query], sort_keys=True)
+
+
+def to_listing(j: dict) -> dict:
+    """Flatten one raw Adzuna result into the shape the API returns (full description)."""
+    return {
+        "id":          str(j.get("id", "")),
+        "title":       j.get("title") or "",
+        "company":     (j.get("company") or {}).get("display_name", "Unknown"),
+        "location":    (j.get("location") or {}).get("display_name", ""),
+        "description": j.get("description") or "",
+        "salary_min":  j.get("salary_min"),
+        "salary_max":  j.get("salary_max"),
+        "url":         j.get("redirect_url", ""),
+        "created":     j.get("created", ""),
+        "category":    (j.get("category") or {}).get("label", ""),
+        "contract":    j.get("contract_time", ""),
+    }
+
+
+def get_client() -> httpx.AsyncClient:
+    """Shared keep-alive client, rebuilt only if the running event loop changes."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=ADZUNA_TIMEOUT,
+            limits=httpx.Limits(max_connections=ADZUNA_MAX_CONNECTIONS,
+                                max_keepalive_connections=ADZUNA_MAX_CONNECTIONS),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def _fetch(country: str, page: int, query: dict) -> str:
+    app_id  = os.getenv("ADZUNA_APP_ID")
+    app_key = os.getenv("ADZUNA_APP_KEY")
+    if not app_id or not app_key:
+        raise CredentialsMissing("Adzuna API credentials not configured.")
+    params = {"app_id": app_id, "app_key": app_key, "content-type": "application/json", **query}
+    # Note: page goes in the URL path only — NOT as a query param
+    url = f"{ADZUNA_BASE_URL}/{country}/search/{page}"
+    _stats["upstream_fetches"] += 1
+    r = await get_client().get(url, params=params)
+    r.raise_for_status()
+    key = cache_key(country, page, query)
+    _cache.set(key, r.text)
+    _record_in_background(key, country, r.text)
+    return r.text
+
+
+def _record_in_background(key: str, country: str, body: str):
+    """Index the page off the request path; sync_page awaits it when it needs the rows."""
+    task = asyncio.ensure_future(_record_page(key, country, body))
+    _record_tasks[key] = task
+    task.add_done_callback(lambda t: _record_tasks.pop(key, None) if _record_tasks.get(key) is t else None)
+
+
+async def _record_page(key: str, country: str, body: str):
+    """Upsert a fetched page into the local store — best effort, never fails the search."""
+    try:
+        data     = json.loads(body)
+        listings = [to_listing(j) for j in data.get("results", [])]
+        await asyncio.to_thread(get_store().record_page, key, country, listings,
+                                data.get("count", 0))
+        _stats["store_syncs"] += 1
+    except (ValueError, sqlite3.Error):
+        _stats["store_errors"] += 1
+
+
+async def search(country: str, page: int, query: dict) -> dict:
+    """Raw Adzuna response for one results page, cached and coalesced by query."""
+    key  = cache_key(country, page, query)
+    body = _cache.get(key)
+    if body is not None and key in _prefetched_keys:
+        _prefetched_keys.discard(key)
+        _stats["prefetch_hits"] += 1
+    if body is None:
+        task = _inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(_fetch(country, page, query))
+            _inflight[key] = task
+            task.add_done_callback(lambda _: _inflight.pop(key, None))
+        else:
+            _stats["coalesced"] += 1
+        body = await asyncio.shield(task)
+    return json.loads(body)
+
+
+async def sync_page(country: str, page: int, query: dict,
+                    max_age: float = JOB_STORE_MAX_AGE) -> str:
+    """Make sure the local store holds a recent copy of one upstream page.
+
+    Returns "fresh" (synced within max_age, no upstream call), "synced" (just
+    fetched), or "stale"/"missing" when upstream is unreachable and the local
+    index is answering on its own.
+    """
+    key = cache_key(country, page, query)
+    age = await asyncio.to_thread(get_store().page_age, key)
+    if age is not None and age < max_age:
+        return "fresh"
+    body = _cache.get(key)
+    if body is not None:              # fetched recently but not in this store (e.g. new file)
+        await _record_page(key, country, body)
+        return "synced"
+    try:
+        await search(country, page, query)
+    except (CredentialsMissing, httpx.HTTPError):
+        return "missing" if age is None else "stale"
+    task = _record_tasks.get(key)
+    if task is not None:
+        await asyncio.shield(task)
+    return "synced"
+
+
+def _take_prefetch_budget(client_id: str) -> bool:
+    now    = time.monotonic()
+    recent = _prefetch_budget.pop(client_id, None) or deque()
+    while recent and recent[0] <= now - 60:
+        recent.popleft()
+    _prefetch_budget[client_id] = recent
+    while len(_prefetch_budget) > JOB_PREFETCH_MAX_CLIENTS:
+        _prefetch_budget.popitem(last=False)
+    if len(recent) >= JOB_PREFETCH_PER_MINUTE:
+        return False
+    recent.append(now)
+    return True
+
+
+async def _prefetch(country: str, page: int, query: dict):
+    key = cache_key(country, page, query)
+    try:
+        await search(country, page, query)
+        _prefetched_keys.add(key)
+        _stats["prefetched"] += 1
+    except Exception:
+        pass   # best effort — the real request will surface any error
+    finally:
+        if len(_prefetched_keys) > 4 * JOB_PREFETCH_MAX_CLIENTS:
+            _prefetched_keys.clear()
+
+
+def prefetch_next(country: str, page: int, query: dict, total: int, client_id: str):
+    """Warm the cache with page + 1 in the background, within the client's budget."""
+    results_per_page = query.get("results_per_page") or 1
+    next_page = page + 1
+    if (next_page - 1) * results_per_page >= total:
+        return
+    key = cache_key(country, next_page, query)
+    if key in _inflight or key in _cache:
+        return
+    if len(_prefetch_tasks) >= JOB_PREFETCH_MAX_INFLIGHT or not _take_prefetch_budget(client_id):
+        _stats["prefetch_skipped"] += 1
+        return
+    task = asyncio.ensure_future(_prefetch(country, next_page, query))
+    _prefetch_tasks.add(task)
+    task.add_done_callback(_prefetch_tasks.discard)
+
+
+# ── Exclusion / inclusion filter ──────────────────────────────────────────────
+def parse_phrases(raw: str) -> frozenset:
+    """Comma-separated phrases from a query param, lowercased."""
+    return frozenset(p.strip().lower() for p in raw.split(",") if p.strip())
+
+
+@functools.lru_cache(maxsize=256)
+def phrase_anchors(phrases: frozenset) -> tuple:
+    """Group phrases under a shared word they all contain, e.g. "citizen" or "clearance".
+
+    Returns ((anchor, (phrase, ...)), ...). Every phrase contains its anchor, so
+    one sweep for the anchor finds every listing that could hold those phrases.
+    """
+    remaining = set(phrases)
+    anchors   = []
+    while remaining:
+        candidates = {w for p in remaining for w in p.split() if len(w) >= 4} or remaining
+        anchor  = max(sorted(candidates),
+                      key=lambda w: (sum(w in p for p in remaining), len(w)))
+        covered = tuple(sorted(p for p in remaining if anchor in p))
+        if not covered:            # anchor can't cover anything: fall back to phrases themselves
+            anchor, covered = min(remaining), (min(remaining),)
+        anchors.append((anchor, covered))
+        remaining.difference_update(covered)
+    return tuple(anchors)
+
+
+def _matching_listings(phrases: frozenset, texts: list[str], blob: str,
+                       starts: list[int]) -> set[int]:
+    """Indexes of listings whose text contains any phrase.
+
+    Each anchor is one C-level str.find sweep over the whole page; a hit is
+    confirmed against that listing's phrases and the sweep jumps to the next
+    listing. This measured faster than a combined regex automaton, which pays
+    interpreter overhead at every position.
+    """
+    hits = set()
+    last = len(starts) - 1
+    for anchor, covered in phrase_anchors(phrases):
+        pos = blob.find(anchor)
+        while pos != -1:
+            index = bisect.bisect_right(starts, pos) - 1
+            if index not in hits and any(p in texts[index] for p in covered):
+                hits.add(index)
+            if index >= last:
+                break
+            pos = blob.find(anchor, starts[index + 1])
+    return hits
+
+
+def filter_listings(listings: list[dict], exclude: frozenset = DEFAULT_EXCLUDE_PHRASES,
+                    include: frozenset = frozenset()) -> list[bool]:
+    """Keep-flags for a page of raw Adzuna results, scanned as one page-wide buffer.
+
+    A listing is dropped if its title or description contains any exclude
+    phrase, or — when include phrases are given — contains none of them.
+    """
+    if not listings or not (exclude or include):
+        return [True] * len(listings)
+    texts  = [((j.get("title") or "") + " " + (j.get("description") or "")).lower() for j in listings]
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + 1
+    blob = "\x00".join(texts)
+
+    excluded = _matching_listings(exclude, texts, blob, starts) if exclude else set()
+    included = (_matching_listings(include, texts, blob, starts)
+                if include else range(len(listings)))
+    return [i not in excluded and i in included for i in range(len(listings))]
+
+
+def search_stats() -> dict:
+    return {**_stats, "in_flight": len(_inflight), "prefetch_in_flight": len(_prefetch_tasks),
+            "store_pending": len(_record_tasks),
+            "cache": _cache.stats()}
@@ -0,0 +1,141 @@
+"""
+job_store.py — Local job listing index (SQLite + FTS5)
+Every upstream Adzuna page is upserted here, deduplicated by Adzuna id, so
+/jobs/local can answer keyword/location/salary/contract queries in milliseconds.
+A pages table records when each (country, page, query) was last synced.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+
+JOB_STORE_PATH    = os.getenv("JOB_STORE_PATH", "jobs.sqlite3")
+JOB_STORE_MAX_AGE = float(os.getenv("JOB_STORE_MAX_AGE", "3600"))   # seconds before a page is stale
+
+COLUMNS = ["id", "title", "company", "location", "description", "salary_min",
+           "salary_max", "url", "created", "category", "contract"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    pk          INTEGER PRIMARY KEY,
+    id          TEXT UNIQUE NOT NULL,
+    country     TEXT NOT NULL,
+    title       TEXT, company TEXT, location TEXT, description TEXT,
+    salary_min  REAL, salary_max REAL,
+    url         TEXT, created TEXT, category TEXT, contract TEXT,
+    synced_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs(country, created);
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title, company, description, location, content='jobs', content_rowid='pk');
+CREATE TRIGGER IF NOT EXISTS jobs_ai AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts(rowid, title, company, description, location)
+    VALUES (new.pk, new.title, new.company, new.description, new.location);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_ad AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, company, description, location)
+    VALUES ('delete', old.pk, old.title, old.company, old.description, old.location);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_au AFTER UPDATE ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, company, description, location)
+    VALUES ('delete', old.pk, old.title, old.company, old.description, old.location);
+    INSERT INTO jobs_fts(rowid, title, company, description, location)
+    VALUES (new.pk, new.title, new.company, new.description, new.location);
+END;
+CREATE TABLE IF NOT EXISTS pages (
+    page_key   TEXT PRIMARY KEY,
+    total      INTEGER NOT NULL,
+    synced_at  REAL NOT NULL
+);
+"""
+
+
+def fts_query(keywords: str) -> str:
+    """Every keyword must appear (prefix match), each quoted so FTS syntax can't leak in."""
+    terms = ['"' + t.replace('"', '""') + '"*' for t in keywords.split()]
+    return " ".join(terms)
+
+
+class JobStore:
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path  = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def record_page(self, page_key: str, country: str, listings: list[dict], total: int):
+        """Upsert one upstream page of listings and mark the page as synced now."""
+        now  = time.time()
+        rows = [(country.lower(), now, *[j.get(c) for c in COLUMNS]) for j in listings if j.get("id")]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO jobs (country, synced_at, {', '.join(COLUMNS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(COLUMNS))}) "
+                f"ON CONFLICT(id) DO UPDATE SET country = excluded.country, "
+                f"synced_at = excluded.synced_at, "
+                + ", ".join(f"{c} = excluded.{c}" for c in COLUMNS if c != "id"),
+                rows)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (page_key, total, synced_at) VALUES (?, ?, ?)",
+                (page_key, total, now))
+
+    def page_age(self, page_key: str) -> float | None:
+        """Seconds since the page was synced, or None if it never was."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at FROM pages WHERE page_key = ?", (page_key,)).fetchone()
+        return None if row is None else time.time() - row["synced_at"]
+
+    def search(self, country: str, keywords: str = "", location: str = "",
+               salary_min: int = 0, contract: str = "", sort_by: str = "date",
+               page: int = 1, results_per_page: int = 12) -> tuple[int, list[dict]]:
+        """(total matches, listings for the requested page) from the local index."""
+        where  = ["j.country = ?"]
+        params = [country.lower()]
+        source = "jobs j"
+        if keywords.strip():
+            source = "jobs_fts f JOIN jobs j ON j.pk = f.rowid"
+            where.append("jobs_fts MATCH ?")
+            params.append(fts_query(keywords))
+        if location.strip():
+            where.append("j.location LIKE ?")
+            params.append(f"%{location.strip()}%")
+        if salary_min > 0:
+            where.append("COALESCE(j.salary_max, j.salary_min) >= ?")
+            params.append(salary_min)
+        if contract:
+            where.append("j.contract = ?")
+            params.append(contract)
+        order = ("COALESCE(j.salary_max, j.salary_min, 0) DESC" if sort_by == "salary"
+                 else "j.created DESC")
+        clause = " AND ".join(where)
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM {source} WHERE {clause}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT {', '.join('j.' + c for c in COLUMNS)} FROM {source} WHERE {clause} "
+                f"ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [results_per_page, (max(page, 1) - 1) * results_per_page]).fetchall()
+        return total, [dict(r) for r in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            jobs  = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            pages = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {"path": self.path, "jobs": jobs, "pages": pages, "max_age": JOB_STORE_MAX_AGE}
+
+
+_store      = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> JobStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStore()
+        return _store
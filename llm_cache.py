@@ -0,0 +1,212 @@
+"""
+llm_cache.py — Content-addressed cache for Groq completions
+Keys are a SHA-256 of (model, system prompt, user prompt, max_tokens, temperature).
+Backends: in-memory LRU bounded by bytes, or SQLite so uvicorn workers share entries.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+
+LLM_CACHE_BACKEND   = os.getenv("LLM_CACHE_BACKEND", "memory")   # memory | sqlite | off
+LLM_CACHE_TTL       = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+LLM_CACHE_PATH      = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+
+
+def make_key(model: str, system: str, user: str, max_tokens: int, temperature: float) -> str:
+    payload = json.dumps([model, system, user, max_tokens, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_size(key: str, value) -> int:
+    return len(key) + (len(value) if isinstance(value, bytes) else len(value.encode("utf-8")))
+
+
+# ── In-memory LRU ─────────────────────────────────────────────────────────────
+class MemoryCache:
+    """LRU keyed by content hash, evicting least-recently-used entries past max_bytes.
+
+    Values may be str or bytes (the PDF render cache reuses this class).
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_bytes: int = LLM_CACHE_MAX_BYTES, ttl: float = LLM_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl       = ttl
+        self._entries  = OrderedDict()   # key -> (value, size, expires_at)
+        self._bytes    = 0
+        self._lock     = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self._bytes -= size
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return value
+
+    # Async callers share one interface with SQLiteCache; memory lookups never block
+    async def aget(self, key: str):
+        return self.get(key)
+
+    async def aset(self, key: str, value):
+        self.set(key, value)
+
+    def __contains__(self, key: str) -> bool:
+        """Fresh entry present? Doesn't touch LRU order or hit/miss counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[2] > time.time()
+
+    def set(self, key: str, value):
+        size = _entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size, time.time() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": self.backend, "entries": len(self._entries),
+                    "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "ttl": self.ttl, **self._counters}
+
+
+# ── SQLite (shared across workers) ────────────────────────────────────────────
+class SQLiteCache:
+    """On-disk cache shared by every worker pointing at the same file.
+
+    Hit/miss counters are per process; entries, bytes and evictions reflect
+    the shared table.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_BYTES,
+                 ttl: float = LLM_CACHE_TTL):
+        self.path      = path
+        self.max_bytes = max_bytes
+        self.ttl       = ttl
+        self._lock     = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._conn     = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key        TEXT PRIMARY KEY,
+                    value      TEXT NOT NULL,
+                    size       INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_used  REAL NOT NULL
+                )""")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache(last_used)")
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._counters["misses"] += 1
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._counters["hits"] += 1
+            return value
+
+    def set(self, key: str, value: str):
+        size = _entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)", (key, value, size, now + self.ttl, now))
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            while total > self.max_bytes:
+                oldest = self._conn.execute(
+                    "SELECT key, size FROM llm_cache ORDER BY last_used LIMIT 1").fetchone()
+                if oldest is None:
+                    break
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+                self._counters["evictions"] += 1
+
+    # Off the event loop: a write can wait out the busy timeout on another worker's lock
+    async def aget(self, key: str):
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str):
+        await asyncio.to_thread(self.set, key, value)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+            return {"backend": self.backend, "entries": entries, "bytes": total,
+                    "max_bytes": self.max_bytes, "ttl": self.ttl, "path": self.path,
+                    **self._counters}
+
+
+# ── Process-wide instance ─────────────────────────────────────────────────────
+_cache      = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Configured cache backend, or None when LLM_CACHE_BACKEND=off."""
+    global _cache
+    if LLM_CACHE_BACKEND == "off":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = SQLiteCache() if LLM_CACHE_BACKEND == "sqlite" else MemoryCache()
+        return _cache
+
+
+def cache_stats() -> dict:
+    cache = get_cache()
+    return cache.stats() if cache is not None else {"backend": "off"}
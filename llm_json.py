@@ -0,0 +1,315 @@
+"""
+llm_json.py — JSON model output: incremental scanning, repair and validation
+The scanner consumes text chunk by chunk, stops at the end of the first JSON
+value (so trailing prose with braces is ignored) and can close a value that was
+cut off at max_tokens. Parsed output is validated against a per-endpoint
+Pydantic schema that fills defaults and drops secondary fields the model got
+wrong; only a missing or invalid primary field (a score, the list of questions
+or rewrites) fails the request.
+"""
+
+import json
+import re
+import threading
+from typing import Annotated, Any, ClassVar
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, ValidationError
+
+_stats      = {"parsed": 0, "repaired": 0, "fields_dropped": 0, "failed": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(stat: str, n: int = 1):
+    with _stats_lock:
+        _stats[stat] += n
+
+
+# ── Incremental scanner ───────────────────────────────────────────────────────
+class JSONScanner:
+    """Tracks nesting and string state of the first JSON value as text arrives."""
+
+    CLOSERS = {"{": "}", "[": "]"}
+
+    def __init__(self, opening: str = "{["):
+        self.opening   = opening
+        self.chars     = []
+        self.frames    = []       # [open char, index of opener, index of last comma]
+        self.in_string = False
+        self.string_at = -1       # index of the open string's quote
+        self.escape    = False
+        self.done      = False
+
+    @property
+    def started(self) -> bool:
+        return bool(self.chars)
+
+    def feed(self, chunk: str):
+        for ch in chunk:
+            if self.done:
+                return
+            if not self.chars:
+                if ch in self.opening:
+                    self.frames.append([ch, 0, -1])
+                    self.chars.append(ch)
+                continue
+            index = len(self.chars)
+            self.chars.append(ch)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+                self.string_at = index
+            elif ch in "{[":
+                self.frames.append([ch, index, -1])
+            elif ch in "}]":
+                self.frames.pop()
+                self.done = not self.frames
+            elif ch == ",":
+                self.frames[-1][2] = index
+
+    def value(self, partial_keys: frozenset = frozenset()) -> Any:
+        """The scanned value, closed off if the text stopped partway through it.
+
+        A cut-off string or literal is dropped along with the array item it
+        belongs to, or its key/value pair outside arrays; only a string value of
+        a top-level key in partial_keys is closed where it stopped. An object
+        left open inside an array is always dropped whole.
+        """
+        text = "".join(self.chars)
+        if self.done:
+            return json.loads(text)
+        if not self.chars:
+            raise ValueError("No JSON value in model output.")
+        frames  = [list(f) for f in self.frames]
+        cut_off = self.in_string or text.rstrip()[-1] not in '"}],[{:'
+        if self.in_string and len(frames) == 1 and frames[0][0] == "{":
+            key = _KEY_RE.match(text[max(frames[0][1], frames[0][2]) + 1:self.string_at])
+            if key and json.loads(f'"{key.group(1)}"') in partial_keys:
+                # Close the open string, minus a half-written escape sequence
+                text    = re.sub(r"\\(u[0-9a-fA-F]{0,3})?$", "", text) + '"'
+                cut_off = False
+        if cut_off:
+            # Cut-off string or literal: drop the array item holding it (a whole
+            # question, tip, keyword), or just the key/value when not in an array
+            arrays = [i for i, f in enumerate(frames) if f[0] == "["]
+            depth  = arrays[-1] if arrays else len(frames) - 1
+            frame  = frames[depth]
+            del frames[depth + 1:]
+            text = text[:frame[2] if frame[2] > frame[1] else frame[1] + 1]
+        for depth, frame in enumerate(frames[:-1]):
+            if frame[0] == "[" and frames[depth + 1][0] == "{":
+                # A question without its answer, a rewrite without the improved
+                # line: objects in arrays are all-or-nothing, so cut to the last
+                # complete item of the outermost such array
+                del frames[depth + 1:]
+                text = text[:frame[2] if frame[2] > frame[1] else frame[1] + 1]
+                break
+        # Close as-is first; failing that, cut back to the innermost frame's last
+        # comma (dropping the partial element), then to its empty container.
+        while frames:
+            closers = "".join(self.CLOSERS[f[0]] for f in reversed(frames))
+            try:
+                return json.loads(text + closers)
+            except ValueError:
+                pass
+            frame = frames[-1]
+            if frame[2] > frame[1]:
+                text, frame[2] = text[:frame[2]], -1
+            elif len(text) > frame[1] + 1:
+                text = text[:frame[1] + 1]
+            else:
+                frames.pop()
+                text = text[:frame[1]].rstrip().rstrip(",:").rstrip()
+                if frames and text.endswith('"') and frames[-1][0] == "{":
+                    # The dropped container was a value: drop its key as well
+                    key_start = text.rfind('"', 0, len(text) - 1)
+                    text = text[:key_start].rstrip().rstrip(",")
+        raise ValueError("Could not repair JSON in model output.")
+
+
+_KEY_RE            = re.compile(r'\s*"((?:[^"\\]|\\.)*)"\s*:\s*$')   # '"key": ' before a value
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+
+def parse_json(text: str, schema: type[BaseModel] | None = None) -> Any:
+    """First JSON value in text, repaired if truncated, validated against schema if given."""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        scanner = JSONScanner("{" if schema is not None and not schema.accepts_list else "{[")
+        scanner.feed(text)
+        try:
+            if scanner.done:
+                try:
+                    data = scanner.value()
+                except ValueError:
+                    data = json.loads(_TRAILING_COMMA_RE.sub(r"\1", "".join(scanner.chars)))
+            else:
+                data = scanner.value(schema.partial_keys if schema is not None else frozenset())
+                _count("repaired")
+        except ValueError:
+            _count("failed")
+            raise
+    _count("parsed")
+    return validate(data, schema) if schema is not None else data
+
+
+def validate(data: Any, schema: type[BaseModel]) -> dict:
+    """schema-shaped dict; optional top-level fields that don't validate fall back to defaults."""
+    if isinstance(data, list) and schema.accepts_list:
+        data = {schema.list_field: data}
+    if not isinstance(data, dict):
+        _count("failed")
+        raise ValueError("Model output is not a JSON object.")
+    required = {name for name, field in schema.model_fields.items() if field.is_required()}
+    for _ in range(3):
+        try:
+            return schema.model_validate(data).model_dump()
+        except ValidationError as e:
+            bad = {err["loc"][0] for err in e.errors() if err["loc"]}
+            if bad & required or not bad & data.keys():
+                _count("failed")
+                raise ValueError(f"Model output does not match {schema.__name__}.") from None
+            _count("fields_dropped", len(bad & data.keys()))
+            data = {k: v for k, v in data.items() if k not in bad}
+    _count("failed")
+    raise ValueError(f"Model output does not match {schema.__name__}.")
+
+
+def json_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+
+# ── Coercions ─────────────────────────────────────────────────────────────────
+# Models drift on scalars ("85%", 7.5, a bare string where a list belongs);
+# these normalize the common cases before Pydantic checks the type.
+def _as_text(v):
+    if v is None:
+        return ""
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, ensure_ascii=False)
+    return v if isinstance(v, str) else str(v)
+
+
+def _as_list(v):
+    if v is None:
+        return []
+    if isinstance(v, str):
+        return [v] if v.strip() else []
+    return [x for x in v if x is not None] if isinstance(v, list) else v
+
+
+def _as_score(v):
+    if isinstance(v, str):
+        match = re.search(r"-?\d+(?:\.\d+)?", v)
+        v = float(match.group()) if match else v
+    if isinstance(v, float):
+        v = round(v)
+    return max(0, min(100, v)) if isinstance(v, int) and not isinstance(v, bool) else v
+
+
+def _as_items(v):
+    return [x for x in v if isinstance(x, dict)] if isinstance(v, list) else v
+
+
+Text     = Annotated[str, BeforeValidator(_as_text)]
+TextList = Annotated[list[Text], BeforeValidator(_as_list)]
+Score    = Annotated[int, BeforeValidator(_as_score)]
+
+
+# ── Schemas ───────────────────────────────────────────────────────────────────
+class Output(BaseModel):
+    """Fields without a default are required; fields the prompt didn't ask for pass through."""
+    model_config = ConfigDict(extra="allow")
+    accepts_list: ClassVar[bool] = False   # a bare JSON array is the value of list_field
+    list_field:   ClassVar[str]  = ""
+    partial_keys: ClassVar[frozenset] = frozenset()   # free text kept even if cut off
+
+
+class Tip(Output):
+    area: Text = ""
+    tip:  Text = ""
+
+
+class Skills(Output):
+    technical: TextList = []
+    soft:      TextList = []
+
+
+class AnalyzeResult(Output):
+    overall_score:    Score
+    scores:           dict[str, Score] = {}
+    skills:           Skills = Skills()
+    experience_years: float | Text = 0
+    education:        Text = ""
+    strengths:        TextList = []
+    weaknesses:       TextList = []
+    ats_issues:       TextList = []
+    improvement_tips: Annotated[list[Tip], BeforeValidator(_as_items)] = []
+    weak_bullets:     TextList = []
+
+
+class MatchResult(Output):
+    match_score:      Score
+    verdict:          Text = ""
+    matched_skills:   TextList = []
+    missing_skills:   TextList = []
+    missing_keywords: TextList = []
+    recommendations:  TextList = []
+    should_apply:     bool = False
+    summary:          Text = ""
+
+    partial_keys = frozenset({"summary"})
+
+
+class Rewrite(Output):
+    original: Text = ""
+    improved: Text = ""
+    reason:   Text = ""
+
+
+class RewriteResult(Output):
+    rewrites: Annotated[list[Rewrite], BeforeValidator(_as_items), Field(min_length=1)]
+
+
+class TailorMeta(Output):
+    changes_made:      TextList = []
+    keywords_to_add:   TextList = []
+    match_improvement: Text = ""
+
+
+class Keywords(Output):
+    """{"keywords": [...]} in JSON mode; a bare array is accepted too."""
+    accepts_list = True
+    list_field   = "keywords"
+
+    keywords: TextList = []
+
+
+class InterviewMeta(Output):
+    role:                Text = ""
+    key_topics_to_study: TextList = []
+    red_flags_to_avoid:  TextList = []
+
+
+class Question(Output):
+    category:     Text = ""
+    question:     Text = ""
+    ideal_answer: Text = ""
+    tip:          Text = ""
+
+
+class QuestionSet(Output):
+    questions: Annotated[list[Question], BeforeValidator(_as_items), Field(min_length=1)]
+
+
+class CoverMeta(Output):
+    company_name:     Text = ""
+    job_title:        Text = ""
+    key_requirements: TextList = []
+    company_values:   TextList = []
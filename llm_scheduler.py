@@ -0,0 +1,230 @@
+"""
+llm_scheduler.py — Rate-limit aware gate in front of every Groq call
+Requests-per-minute and tokens-per-minute token buckets decide when a call may
+start. Each call reserves its prompt estimate plus max_tokens; unused tokens are
+refunded from the reported usage and Groq's x-ratelimit-* headers resync the
+buckets. Waiting calls start in priority order (interactive before bulk), and
+429s, 5xx and connection errors retry with jittered exponential backoff.
+GROQ_BASE_URL can point the client at a local fake server to exercise this.
+"""
+
+import os
+import re
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import threading
+import contextvars
+from groq import RateLimitError, InternalServerError, APIConnectionError
+
+GROQ_RPM         = float(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM         = float(os.getenv("GROQ_TPM", "12000"))   # raised/lowered by x-ratelimit-limit-tokens
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "4"))
+GROQ_RETRY_BASE  = float(os.getenv("GROQ_RETRY_BASE", "0.5"))
+GROQ_RETRY_MAX   = float(os.getenv("GROQ_RETRY_MAX", "30"))
+
+RETRYABLE = (RateLimitError, InternalServerError, APIConnectionError)
+
+# Calls made while this is BULK wait behind every queued INTERACTIVE call
+INTERACTIVE, BULK = 0, 1
+priority = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+
+class TokenBucket:
+    """Refills continuously to capacity over one period (a minute)."""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = capacity
+        self.period   = period
+        self.level    = capacity
+        self.updated  = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level   = min(self.capacity, self.level + (now - self.updated) * self.capacity / self.period)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount (capped at capacity) is available."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) * self.period / self.capacity
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float, now: float):
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, now: float, capacity: float | None = None, remaining: float | None = None):
+        """Adopt the server's view: its limit, and its remaining count when lower than ours."""
+        self._refill(now)
+        if capacity:
+            self.capacity = capacity
+        if remaining is not None:
+            self.level = min(self.level, remaining)
+
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS       = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: str | None) -> float | None:
+    """Groq reset headers look like "7.66s", "2m59.56s" or "120ms"; retry-after is plain seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parts = _DURATION_RE.findall(value)
+        return sum(float(n) * _UNITS[u] for n, u in parts) if parts else None
+
+
+def _header_float(headers, name: str) -> float | None:
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class Scheduler:
+    def __init__(self, rpm: float = GROQ_RPM, tpm: float = GROQ_TPM):
+        self.requests      = TokenBucket(rpm)
+        self.tokens        = TokenBucket(tpm)
+        self._lock         = threading.Lock()   # /stats reads the buckets from a threadpool thread
+        self._paused_until = 0.0
+        self._waiters      = []                 # heap of (priority, seq)
+        self._seq          = itertools.count()
+        self._cond         = None
+        self._loop         = None
+        self._stats        = {"calls": 0, "queued": 0, "waited_seconds": 0.0, "retries": 0,
+                              "rate_limited": 0, "refunded_tokens": 0, "header_syncs": 0}
+
+    # ── Admission ────────────────────────────────────────────────────────────
+    def _reserve(self, amount: float) -> float:
+        """Take one request and amount tokens now (returns 0), or the seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            delay = max(self._paused_until - now,
+                        self.requests.wait_time(1, now), self.tokens.wait_time(amount, now))
+            if delay <= 0:
+                self.requests.take(1, now)
+                self.tokens.take(amount, now)
+                self._stats["calls"] += 1
+            return delay
+
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._cond is None or self._loop is not loop:
+            self._cond, self._loop, self._waiters = asyncio.Condition(), loop, []
+        return self._cond
+
+    async def acquire(self, amount: float):
+        """Wait for budget; only the highest-priority, oldest waiter may take it."""
+        if not self._waiters and self._reserve(amount) <= 0:
+            return
+        cond  = self._condition()
+        entry = (priority.get(), next(self._seq))
+        start = time.monotonic()
+        self._stats["queued"] += 1
+        async with cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if self._waiters[0] != entry:
+                        await cond.wait()
+                        continue
+                    delay = self._reserve(amount)
+                    if delay <= 0:
+                        return
+                    try:
+                        await asyncio.wait_for(cond.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._stats["waited_seconds"] += time.monotonic() - start
+                cond.notify_all()
+
+    # ── Feedback ─────────────────────────────────────────────────────────────
+    def _observe(self, headers, reserved: float, usage=None):
+        now = time.monotonic()
+        with self._lock:
+            used = getattr(usage, "total_tokens", None)
+            if used is not None and used < reserved:
+                self.tokens.give(reserved - used, now)
+                self._stats["refunded_tokens"] += int(reserved - used)
+            limit     = _header_float(headers, "x-ratelimit-limit-tokens")
+            remaining = _header_float(headers, "x-ratelimit-remaining-tokens")
+            if limit or remaining is not None:
+                self.tokens.sync(now, capacity=limit, remaining=remaining)
+                self._stats["header_syncs"] += 1
+            # Request headers track the daily quota: stop entirely once it's spent
+            if _header_float(headers, "x-ratelimit-remaining-requests") == 0:
+                reset = parse_duration(headers.get("x-ratelimit-reset-requests")) or 60.0
+                self._paused_until = max(self._paused_until, now + reset)
+
+    def _backoff(self, error: Exception, attempt: int, reserved: float) -> float | None:
+        """Delay before retrying a failed call, or None when it shouldn't be retried."""
+        now = time.monotonic()
+        with self._lock:
+            self.tokens.give(reserved, now)          # a rejected call consumed no tokens
+            if not isinstance(error, RETRYABLE) or attempt >= GROQ_MAX_RETRIES:
+                return None
+            response    = getattr(error, "response", None)
+            headers     = response.headers if response is not None else {}
+            retry_after = parse_duration(headers.get("retry-after"))
+            delay = (retry_after if retry_after is not None else
+                     min(GROQ_RETRY_MAX, GROQ_RETRY_BASE * 2 ** attempt) * random.uniform(0.5, 1.0))
+            if isinstance(error, RateLimitError):
+                # Everyone backs off, not just this caller
+                self._stats["rate_limited"] += 1
+                self._paused_until = max(self._paused_until, now + delay)
+                self.tokens.sync(now, remaining=_header_float(headers, "x-ratelimit-remaining-tokens"))
+            self._stats["retries"] += 1
+            return delay + random.uniform(0, GROQ_RETRY_BASE)
+
+    # ── Entry points ─────────────────────────────────────────────────────────
+    async def run(self, send, prompt_tokens: int, max_tokens: int):
+        """Parsed result of `await send()` (a with_raw_response call) under the budgets."""
+        reserved = prompt_tokens + max_tokens
+        for attempt in range(GROQ_MAX_RETRIES + 1):
+            await self.acquire(reserved)
+            try:
+                raw = await send()
+            except Exception as e:
+                delay = self._backoff(e, attempt, reserved)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            result = await raw.parse()
+            self._observe(raw.headers, reserved, getattr(result, "usage", None))
+            return result
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            self.requests._refill(now)
+            self.tokens._refill(now)
+            return {**self._stats, "waited_seconds": round(self._stats["waited_seconds"], 2),
+                    "waiting": len(self._waiters),
+                    "rpm": self.requests.capacity, "tpm": self.tokens.capacity,
+                    "requests_available": round(self.requests.level, 1),
+                    "tokens_available": round(self.tokens.level),
+                    "paused_for": round(max(0.0, self._paused_until - now), 1)}
+
+
+_scheduler = Scheduler()
+
+
+def get_scheduler() -> Scheduler:
+    return _scheduler
+
+
+def scheduler_stats() -> dict:
+    return _scheduler.stats()
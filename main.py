@@ -2,21 +2,42 @@
 main.py — ResumeIQ API
 Endpoints:
   POST /analyze        - Analyze resume PDF → score, feedback, ATS check
+  POST /analyze/bulk   - Queue many PDFs (or a zip) for analysis
   POST /match-job      - Match resume against a job description
   POST /rewrite        - Rewrite weak bullet points
   GET  /jobs           - Search real job listings via Adzuna API
+  GET  /jobs/local     - Search the local job index, syncing stale pages from Adzuna
+  GET  /jobs/{id}      - Progress and partial results of a bulk analysis job
 """
 
-import os
-import requests as http_requests
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
-from fastapi.responses import Response
+import json
+import httpx
+from groq import RateLimitError
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from analyzer import extract_resume_text, analyze_resume, match_job, rewrite_bullets, tailor_resume, generate_interview_qa, generate_resume_pdf, generate_cover_letter
+from llm_cache import cache_stats
+from prompt_budget import budget_stats
+from llm_scheduler import scheduler_stats
+from llm_json import json_stats
+from prescore import score_jobs
+import job_search
+import bulk_jobs
+from job_store import get_store
+from analyzer import load_resume, get_resume_text, analyze_resume, match_job, match_jobs_batch, MATCH_BATCH_MAX_JOBS, rewrite_bullets, tailor_resume, tailor_resume_events, generate_interview_qa, render_resume_pdf, RenderQueueFull, render_stats, tailor_stats, generate_cover_letter, cover_letter_events, pool_stats, inflight_stats
 import uvicorn
 
-app = FastAPI(title="ResumeIQ API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    bulk_jobs.start_workers()   # resumes any bulk items left pending by a restart
+    yield
+    await bulk_jobs.stop_workers()
+
+
+app = FastAPI(title="ResumeIQ API", version="1.0.0", lifespan=lifespan)
 
 import os as _os
 _origins = ["http://localhost:3000", "http://127.0.0.1:3000"]
@@ -38,6 +59,23 @@ def root():
     return {"status": "running", "message": "ResumeIQ API is live"}
 
 
+@app.get("/stats")
+def stats():
+    """Runtime counters for the Groq connection pool, LLM cache and PDF renderer."""
+    return {"groq_pool": pool_stats(), "llm_cache": cache_stats(),
+            "llm_inflight": inflight_stats(), "llm_json": json_stats(), "pdf_render": render_stats(),
+            "prompt_budget": budget_stats(), "llm_scheduler": scheduler_stats(), "tailor": tailor_stats(),
+            "bulk": bulk_jobs.bulk_stats(),
+            "job_search": job_search.search_stats(), "job_store": get_store().stats()}
+
+
+def rate_limited(error: RateLimitError) -> HTTPException:
+    """Groq is still rate limiting after the scheduler's retries: ask the client to come back."""
+    retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+    return HTTPException(status_code=503, detail="AI service is rate limited. Try again shortly.",
+                         headers={"Retry-After": retry_after or "10"})
+
+
 @app.post("/analyze")
 async def analyze(file: UploadFile = File(...)):
     """Upload resume PDF → returns score, feedback, ATS check, skills."""
@@ -47,47 +85,108 @@ async def analyze(file: UploadFile = File(...)):
     if len(file_bytes) > 10 * 1024 * 1024:
         raise HTTPException(status_code=400, detail="File too large. Max 10MB.")
     try:
-        resume_text = extract_resume_text(file_bytes)
+        resume_id, resume_text = await run_in_threadpool(load_resume, file_bytes)
         if not resume_text.strip():
             raise HTTPException(status_code=422, detail="Could not extract text from PDF.")
-        result = analyze_resume(resume_text)
+        result = await analyze_resume(resume_text)
+        result["resume_id"] = resume_id
         return result
     except HTTPException:
         raise
+    except RateLimitError as e:
+        raise rate_limited(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+@app.post("/analyze/bulk", status_code=202)
+async def analyze_bulk(files: list[UploadFile] = File(...)):
+    """Queue many resume PDFs (or zips of them); poll GET /jobs/{id} for progress."""
+    try:
+        uploads = await bulk_jobs.read_uploads(files)
+        pdfs    = await run_in_threadpool(bulk_jobs.collect_pdfs, uploads)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    job_id = await bulk_jobs.submit(pdfs)
+    return {"job_id": job_id, "total": len(pdfs), "status_url": f"/jobs/{job_id}"}
+
+
+def sse_response(events, failure: str) -> StreamingResponse:
+    """Stream analyzer events as text/event-stream; errors become a final error event."""
+    async def body():
+        try:
+            async for event in events:
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': f'{failure}: {str(e)}'})}\n\n"
+    return StreamingResponse(body(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def resolve_resume_text(resume_text: str, resume_id: str) -> str:
+    """Prefer inline resume_text; otherwise look up a resume_id returned by /analyze."""
+    if resume_text.strip() or not resume_id:
+        return resume_text
+    text = get_resume_text(resume_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Unknown resume_id. Upload the resume again.")
+    return text
+
+
 class JobMatchRequest(BaseModel):
-    resume_text: str
+    resume_text: str = ""
+    resume_id: str = ""
     job_description: str
 
 
 @app.post("/match-job")
-def match_job_endpoint(request: JobMatchRequest):
+async def match_job_endpoint(request: JobMatchRequest):
     """Match resume text against a job description."""
-    if not request.resume_text.strip() or not request.job_description.strip():
+    resume_text = resolve_resume_text(request.resume_text, request.resume_id)
+    if not resume_text.strip() or not request.job_description.strip():
         raise HTTPException(status_code=400, detail="Both resume text and job description required.")
     try:
-        result = match_job(request.resume_text, request.job_description)
+        result = await match_job(resume_text, request.job_description)
         return result
+    except RateLimitError as e:
+        raise rate_limited(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Job matching failed: {str(e)}")
 
 
+class BatchMatchRequest(BaseModel):
+    resume_text: str = ""
+    resume_id: str = ""
+    job_descriptions: list[str]
+
+
+@app.post("/match-jobs/batch")
+async def match_jobs_batch_endpoint(request: BatchMatchRequest):
+    """Match one resume against many job descriptions; results keep input order."""
+    resume_text = resolve_resume_text(request.resume_text, request.resume_id)
+    if not resume_text.strip() or not request.job_descriptions:
+        raise HTTPException(status_code=400, detail="Resume text and at least one job description required.")
+    if len(request.job_descriptions) > MATCH_BATCH_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"Too many job descriptions. Max {MATCH_BATCH_MAX_JOBS}.")
+    results = await match_jobs_batch(resume_text, request.job_descriptions)
+    return {"results": results, "failed": sum(1 for r in results if "error" in r)}
+
+
 class RewriteRequest(BaseModel):
     bullets: list[str]
     job_title: str = ""
 
 
 @app.post("/rewrite")
-def rewrite_endpoint(request: RewriteRequest):
+async def rewrite_endpoint(request: RewriteRequest):
     """Rewrite weak resume bullet points to be more impactful."""
     if not request.bullets:
         raise HTTPException(status_code=400, detail="No bullet points provided.")
     try:
-        result = rewrite_bullets(request.bullets, request.job_title)
+        result = await rewrite_bullets(request.bullets, request.job_title)
         return result
+    except RateLimitError as e:
+        raise rate_limited(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Rewrite failed: {str(e)}")
 
@@ -95,33 +194,51 @@ def rewrite_endpoint(request: RewriteRequest):
 
 
 class TailorRequest(BaseModel):
-    resume_text: str
+    resume_text: str = ""
+    resume_id: str = ""
     job_description: str
 
 
 @app.post("/tailor")
-def tailor_endpoint(request: TailorRequest):
+async def tailor_endpoint(request: TailorRequest):
     """Tailor resume text to match a specific job description."""
-    if not request.resume_text.strip() or not request.job_description.strip():
+    resume_text = resolve_resume_text(request.resume_text, request.resume_id)
+    if not resume_text.strip() or not request.job_description.strip():
         raise HTTPException(status_code=400, detail="Both resume text and job description required.")
     try:
-        return tailor_resume(request.resume_text, request.job_description)
+        return await tailor_resume(resume_text, request.job_description)
+    except RateLimitError as e:
+        raise rate_limited(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Tailoring failed: {str(e)}")
 
 
+@app.post("/tailor/stream")
+async def tailor_stream_endpoint(request: TailorRequest):
+    """Server-Sent Events variant of /tailor — each section is sent as soon as it is ready."""
+    resume_text = resolve_resume_text(request.resume_text, request.resume_id)
+    if not resume_text.strip() or not request.job_description.strip():
+        raise HTTPException(status_code=400, detail="Both resume text and job description required.")
+    return sse_response(tailor_resume_events(resume_text, request.job_description), "Tailoring failed")
+
+
 class InterviewRequest(BaseModel):
-    resume_text: str
+    resume_text: str = ""
+    resume_id: str = ""
     job_description: str
+    batches: int = 1   # each batch adds 10 questions, generated in parallel
 
 
 @app.post("/interview-qa")
-def interview_qa_endpoint(request: InterviewRequest):
+async def interview_qa_endpoint(request: InterviewRequest):
     """Generate interview questions and ideal answers based on resume and job."""
-    if not request.resume_text.strip() or not request.job_description.strip():
+    resume_text = resolve_resume_text(request.resume_text, request.resume_id)
+    if not resume_text.strip() or not request.job_description.strip():
         raise HTTPException(status_code=400, detail="Both resume text and job description required.")
     try:
-        return generate_interview_qa(request.resume_text, request.job_description)
+        return await generate_interview_qa(resume_text, request.job_description, request.batches)
+    except RateLimitError as e:
+        raise rate_limited(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Interview Q&A generation failed: {str(e)}")
 
@@ -134,36 +251,53 @@ class DownloadResumeRequest(BaseModel):
 
 @app.post("/cover-letter")
 async def cover_letter_endpoint(payload: dict):
-    resume_text      = payload.get("resume_text", "")
+    resume_text      = resolve_resume_text(payload.get("resume_text", ""), payload.get("resume_id", ""))
     job_description  = payload.get("job_description", "")
     tone             = payload.get("tone", "professional")
     if not resume_text or not job_description:
         raise HTTPException(400, "resume_text and job_description required")
     try:
-        result = generate_cover_letter(resume_text, job_description, tone)
+        result = await generate_cover_letter(resume_text, job_description, tone)
         return result
+    except RateLimitError as e:
+        raise rate_limited(e)
     except Exception as e:
         raise HTTPException(500, str(e))
 
 
+@app.post("/cover-letter/stream")
+async def cover_letter_stream_endpoint(payload: dict):
+    """Server-Sent Events variant of /cover-letter — streams the letter token by token."""
+    resume_text      = resolve_resume_text(payload.get("resume_text", ""), payload.get("resume_id", ""))
+    job_description  = payload.get("job_description", "")
+    tone             = payload.get("tone", "professional")
+    if not resume_text or not job_description:
+        raise HTTPException(400, "resume_text and job_description required")
+    return sse_response(cover_letter_events(resume_text, job_description, tone), "Cover letter failed")
+
+
 @app.post("/download-resume")
-def download_resume(request: DownloadResumeRequest):
+async def download_resume(request: DownloadResumeRequest):
     """Convert tailored resume text to a downloadable PDF."""
     if not request.resume_text.strip():
         raise HTTPException(status_code=400, detail="Resume text is required.")
     try:
-        pdf_bytes = generate_resume_pdf(request.resume_text)
+        pdf_bytes = await render_resume_pdf(request.resume_text)
         safe_name = request.filename.replace(" ", "_").replace("/", "_")
         return Response(
             content=pdf_bytes,
             media_type="application/pdf",
             headers={"Content-Disposition": f'attachment; filename="{safe_name}.pdf"'},
         )
+    except RenderQueueFull:
+        raise HTTPException(status_code=503, detail="PDF renderer is busy. Try again shortly.",
+                            headers={"Retry-After": "2"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
 
 @app.get("/jobs")
-def search_jobs(
+async def search_jobs(
+    request: Request,
     keywords: str = "",
     location: str = "us",
     country: str = "us",
@@ -172,77 +306,116 @@ def search_jobs(
     sort_by: str = "date",         # date | salary
     full_time: int = 0,            # 1 = full-time only
     salary_min: int = 0,
+    rank_by_resume: str = "",      # resume_id from /analyze → rank results locally
+    top_k: int = 5,                # with rank_by_resume: how many to flag for /match-job
+    prefetch: int = 0,             # 1 = warm the cache with page + 1 in the background
+    exclude: str = "",             # extra comma-separated phrases that hide a listing
+    include: str = "",             # comma-separated phrases; keep only listings with one
+    exclude_defaults: int = 1,     # 0 = don't hide citizenship/clearance listings
 ):
     """Search real job listings from Adzuna API."""
-    app_id  = os.getenv("ADZUNA_APP_ID")
-    app_key = os.getenv("ADZUNA_APP_KEY")
-    if not app_id or not app_key:
-        raise HTTPException(status_code=503, detail="Adzuna API credentials not configured.")
-
-    params = {
-        "app_id":           app_id,
-        "app_key":          app_key,
-        "results_per_page": results_per_page,
-        "content-type":     "application/json",
-    }
-    if keywords:        params["what"]       = keywords
-    if location:        params["where"]      = location
-    if sort_by:         params["sort_by"]    = sort_by
-    if full_time:       params["full_time"]  = 1
-    if salary_min > 0:  params["salary_min"] = salary_min
-
-    # Note: page goes in the URL path only — NOT as a query param
-    url = f"https://api.adzuna.com/v1/api/jobs/{country}/search/{page}"
+    resume_text = resolve_resume_text("", rank_by_resume) if rank_by_resume else ""
+    query = job_search.build_query(keywords, location, results_per_page,
+                                   sort_by, full_time, salary_min)
     try:
-        r = http_requests.get(url, params=params, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        # Filter out jobs requiring US citizenship, clearance, etc.
-        EXCLUDE_PHRASES = [
-            "us citizen", "u.s. citizen", "united states citizen",
-            "must be a citizen", "citizenship required", "citizenship is required",
-            "security clearance", "secret clearance", "top secret", "ts/sci",
-            "active clearance", "clearance required", "dod clearance",
-            "us persons only", "u.s. persons only",
-            "itar", "export control", "must hold us",
-        ]
-
-        def is_excluded(title: str, description: str) -> bool:
-            text = (title + " " + description).lower()
-            return any(phrase in text for phrase in EXCLUDE_PHRASES)
+        data = await job_search.search(country, page, query)
+        if prefetch:
+            client_id = request.client.host if request.client else "anonymous"
+            job_search.prefetch_next(country, page, query, data.get("count", 0), client_id)
+        # Filter out jobs requiring US citizenship, clearance, etc. (plus per-user phrases)
+        exclude_phrases = job_search.parse_phrases(exclude)
+        if exclude_defaults:
+            exclude_phrases |= job_search.DEFAULT_EXCLUDE_PHRASES
+        results = data.get("results", [])
+        keep    = job_search.filter_listings(results, exclude_phrases, job_search.parse_phrases(include))
 
         jobs = []
+        full_texts = []
         filtered_count = 0
-        for j in data.get("results", []):
-            title = j.get("title", "")
-            desc  = j.get("description", "")
-            if is_excluded(title, desc):
+        for j, kept in zip(results, keep):
+            if not kept:
                 filtered_count += 1
                 continue
-            jobs.append({
-                "id":          j.get("id", ""),
-                "title":       title,
-                "company":     j.get("company", {}).get("display_name", "Unknown"),
-                "location":    j.get("location", {}).get("display_name", ""),
-                "description": desc[:300] + ("..." if len(desc) > 300 else ""),
-                "salary_min":  j.get("salary_min"),
-                "salary_max":  j.get("salary_max"),
-                "url":         j.get("redirect_url", ""),
-                "created":     j.get("created", ""),
-                "category":    j.get("category", {}).get("label", ""),
-                "contract":    j.get("contract_time", ""),
-            })
-        return {
+            job  = job_search.to_listing(j)
+            desc = job["description"]
+            job["description"] = desc[:300] + ("..." if len(desc) > 300 else "")
+            jobs.append(job)
+            full_texts.append({"title": job["title"], "description": desc})
+        response = {
             "total":        data.get("count", 0),
             "page":         page,
             "results":      jobs,
             "filtered_out": filtered_count,
         }
-    except http_requests.exceptions.Timeout:
+        # Local BM25 pre-score: rank the page and flag the top-K worth an LLM match
+        if resume_text:
+            for job, score in zip(jobs, score_jobs(resume_text, full_texts)):
+                job["prescore"] = score
+            jobs.sort(key=lambda job: job["prescore"], reverse=True)
+            response["match_candidates"] = [job["id"] for job in jobs[:max(0, top_k)]]
+        return response
+    except job_search.CredentialsMissing as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Adzuna API timed out. Try again.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Job search failed: {str(e)}")
 
 
+@app.get("/jobs/local")
+async def search_jobs_local(
+    keywords: str = "",
+    location: str = "",
+    country: str = "us",
+    results_per_page: int = 12,
+    page: int = 1,
+    sort_by: str = "date",         # date | salary
+    salary_min: int = 0,
+    contract: str = "",            # full_time | part_time
+    exclude: str = "",
+    include: str = "",
+    exclude_defaults: int = 1,
+    max_age: float = job_search.JOB_STORE_MAX_AGE,   # seconds before the upstream page is re-synced
+):
+    """Search the local job index; Adzuna is only called for a stale or missing page."""
+    try:
+        query = job_search.build_query(keywords, location, results_per_page, sort_by,
+                                       int(contract == "full_time"), salary_min)
+        sync  = await job_search.sync_page(country, page, query, max_age)
+        total, listings = await run_in_threadpool(
+            get_store().search, country, keywords, location, salary_min, contract,
+            sort_by, page, results_per_page)
+
+        exclude_phrases = job_search.parse_phrases(exclude)
+        if exclude_defaults:
+            exclude_phrases |= job_search.DEFAULT_EXCLUDE_PHRASES
+        keep = job_search.filter_listings(listings, exclude_phrases, job_search.parse_phrases(include))
+        jobs = []
+        for job, kept in zip(listings, keep):
+            if kept:
+                desc = job["description"] or ""
+                job["description"] = desc[:300] + ("..." if len(desc) > 300 else "")
+                jobs.append(job)
+        return {
+            "total":        total,
+            "page":         page,
+            "results":      jobs,
+            "filtered_out": len(listings) - len(jobs),
+            "sync":         sync,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Local job search failed: {str(e)}")
+
+
+# Registered after /jobs/local so that path never reaches this route
+@app.get("/jobs/{job_id}")
+async def bulk_job_status(job_id: str, offset: int = 0, limit: int = 100):
+    """Progress of a bulk analysis job plus a page of per-resume results."""
+    job = await run_in_threadpool(bulk_jobs.get_store().get_job, job_id, offset, limit)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown bulk job id.")
+    return job
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+prescore.py — Local, LLM-free relevance scoring of job listings against a resume
+BM25 over resume terms vs. listing title + description. Runs in milliseconds, so
+/jobs can rank a page and only the top candidates go on to match_job.
+"""
+
+import math
+import re
+from collections import Counter
+
+BM25_K1 = 1.5
+BM25_B  = 0.75
+TITLE_WEIGHT = 2   # title terms count this many times in the document
+
+# Keeps tech tokens intact: c++, c#, node.js, ci/cd, .net
+TOKEN_RE = re.compile(r"[a-z0-9.+#/]*[a-z0-9+#]")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that the
+their this to was we were will with you your i my me us they them he she who
+what when where which how all any can may must should would could etc also
+not no yes than then into over under about across per via using use used
+work working team teams role job experience years year strong ability skills
+""".split())
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for tok in TOKEN_RE.findall(text.lower()):
+        tok = tok.strip("./")
+        if len(tok) > 1 and tok not in STOPWORDS or tok in ("c", "r"):
+            tokens.append(tok)
+    return tokens
+
+
+def _terms(text: str) -> list[str]:
+    """Unigrams plus adjacent bigrams, so "machine learning" outranks either word."""
+    tokens = tokenize(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def score_jobs(resume_text: str, jobs: list[dict]) -> list[float]:
+    """BM25 score (0-100, relative to the best listing) for each job, in input order."""
+    if not jobs:
+        return []
+    docs = [Counter(_terms(j.get("title", "")) * TITLE_WEIGHT + _terms(j.get("description", "")))
+            for j in jobs]
+    lengths = [sum(d.values()) for d in docs]
+    avg_len = (sum(lengths) / len(lengths)) or 1.0
+
+    df = Counter()
+    for d in docs:
+        df.update(d.keys())
+    query = set(_terms(resume_text)) & df.keys()
+
+    n = len(docs)
+    idf = {t: math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in query}
+    scores = []
+    for d, length in zip(docs, lengths):
+        norm  = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len)
+        score = 0.0
+        for t in query:
+            tf = d.get(t)
+            if tf:
+                score += idf[t] * tf * (BM25_K1 + 1) / (tf + norm)
+        scores.append(score)
+
+    best = max(scores)
+    return [round(100 * s / best, 1) if best > 0 else 0.0 for s in scores]
+
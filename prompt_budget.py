@@ -0,0 +1,181 @@
+"""
+prompt_budget.py — Token budgets for the resume / job description parts of a prompt
+Counts tokens locally, strips low-value job description boilerplate (EEO
+statements, benefits, perks), then splits each task's input budget between
+resume and job description, handing unused share from one side to the other.
+"""
+
+import os
+import re
+import functools
+import threading
+
+# Input-token budget per task (system prompt included) and the resume's share
+# of what's left; the job description gets the rest.
+PROMPT_BUDGET_SCALE = float(os.getenv("PROMPT_BUDGET_SCALE", "1.0"))
+
+TASK_BUDGETS = {
+    "analyze":         (3000, 1.0),
+    "match":           (3200, 0.6),
+    "tailor_meta":     (1600, 0.6),
+    "tailor_keywords": (900,  0.0),
+    "tailor_section":  (700,  0.0),   # JD context only — the section itself is never cut
+    "interview":       (1600, 0.6),
+    "cover_letter":    (2000, 0.65),
+    "cover_meta":      (700,  0.0),
+}
+
+_stats      = {"prompts": 0, "input_tokens": 0, "boilerplate_tokens": 0, "truncated_tokens": 0}
+_stats_lock = threading.Lock()
+
+
+# ── Token counting ────────────────────────────────────────────────────────────
+# Approximates the Llama 3 BPE without shipping its vocabulary: common words are
+# one token, long words one per ~6 letters, digits in groups of three, each
+# punctuation mark its own token. Errs slightly high, which is the safe side.
+_TOKEN_RE = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]|_")
+
+
+def _token_cost(piece: str) -> int:
+    return 1 + (len(piece) - 1) // 6 if piece[0].isalpha() else 1
+
+
+def count_tokens(text: str) -> int:
+    return sum(_token_cost(m.group()) for m in _TOKEN_RE.finditer(text))
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Longest prefix within budget, cut back to a line break when one is close."""
+    if budget <= 0:
+        return ""
+    used = 0
+    end  = len(text)
+    for m in _TOKEN_RE.finditer(text):
+        used += _token_cost(m.group())
+        if used > budget:
+            end = m.start()
+            break
+    else:
+        return text
+    cut = text.rfind("\n", 0, end)
+    if cut > end * 0.8:
+        end = cut
+    return text[:end].rstrip()
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse the runs of spaces and blank lines PDF extraction leaves behind."""
+    text = re.sub(r"[ \t ]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+# ── Job description compression ───────────────────────────────────────────────
+# A heading like "Benefits" or "Equal Opportunity" starts a block that is dropped
+# until the next heading; any paragraph with an EEO/legal marker is dropped too.
+BOILERPLATE_HEADINGS = re.compile(
+    r"^\W*(benefits|perks|benefits (?:&|and) perks|perks (?:&|and) benefits|what we offer|"
+    r"why (?:join|work (?:with|for|at)) us|compensation (?:&|and) benefits|our benefits|total rewards|"
+    r"equal (?:employment )?opportunity(?: employer)?|eeo(?: statement)?|"
+    r"diversity(?:,? equity)?,? (?:&|and) inclusion|diversity|dei|accommodations?|"
+    r"pay transparency|privacy notice|e-verify)\s*[:?!]?\s*$",
+    re.IGNORECASE)
+
+BOILERPLATE_MARKERS = re.compile(
+    r"equal opportunity employer|without regard to|protected veteran|"
+    r"sexual orientation|gender identity|reasonable accommodation|"
+    r"e-verify|affirmative action|401\(k\)|paid time off|"
+    r"dental(?:,| and) vision|pay transparency|applicant privacy",
+    re.IGNORECASE)
+
+# Headings that commonly open the content worth keeping, even when not Title Case
+SECTION_HEADINGS = re.compile(
+    r"^\W*(about|what you|who you|you will|you'll|you have|your role|the role|"
+    r"responsibilities|requirements|qualifications|skills|nice to have|bonus|"
+    r"preferred|day[- ]to[- ]day|we're looking|tech stack|our stack)",
+    re.IGNORECASE)
+
+HEADING_MAX_CHARS = 60
+# A compression that keeps less than this share of the tokens has most likely
+# misread the posting (e.g. a benefits role); the whole text is used instead
+# and fit() truncates it to the budget.
+COMPRESS_MIN_KEEP = 0.4
+BULLET_PREFIXES   = ("•", "▪", "●", "-", "–", "◦", "*")
+
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    return (0 < len(stripped) <= HEADING_MAX_CHARS
+            and not stripped.endswith((".", ",", ";")) and not stripped.startswith(BULLET_PREFIXES)
+            and (stripped.endswith(":") or stripped.isupper() or stripped.istitle()
+                 or bool(SECTION_HEADINGS.match(stripped))))
+
+
+@functools.lru_cache(maxsize=64)
+def compress_job_description(text: str) -> str:
+    """Job description minus boilerplate blocks and paragraphs (or whole, if that leaves little)."""
+    kept, dropping, paragraph = [], False, []
+
+    def flush():
+        if paragraph and not BOILERPLATE_MARKERS.search(" ".join(paragraph)):
+            kept.extend(paragraph)
+        paragraph.clear()
+
+    for line in normalize_whitespace(text).splitlines():
+        if _is_heading(line):
+            flush()
+            dropping = bool(BOILERPLATE_HEADINGS.match(line.strip()))
+            if not dropping:
+                kept.append(line)
+            continue
+        if dropping:
+            continue
+        if not line.strip():
+            flush()
+            kept.append("")
+        else:
+            paragraph.append(line)
+    flush()
+    compressed = re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+    normalized = normalize_whitespace(text)
+    if count_tokens(compressed) < COMPRESS_MIN_KEEP * count_tokens(normalized):
+        return normalized
+    return compressed
+
+
+# ── Allocation ────────────────────────────────────────────────────────────────
+def fit(task: str, system: str = "", resume: str = "", job: str = "") -> tuple[str, str]:
+    """(resume, job) trimmed to the task's budget after boilerplate is removed.
+
+    Each side gets its share of the budget left after the system prompt; a side
+    that needs less than its share passes the remainder to the other.
+    """
+    total, resume_share = TASK_BUDGETS[task]
+    available = max(0, int(total * PROMPT_BUDGET_SCALE) - count_tokens(system))
+
+    job_raw = count_tokens(job)
+    resume  = normalize_whitespace(resume)
+    job     = compress_job_description(job) if job else ""
+    r_need, j_need = count_tokens(resume), count_tokens(job)
+
+    r_budget = int(available * resume_share) if job else available
+    j_budget = available - r_budget if resume else available
+    if r_need < r_budget:
+        j_budget += r_budget - r_need
+    elif j_need < j_budget:
+        r_budget += j_budget - j_need
+
+    resume_fit = truncate_to_tokens(resume, r_budget) if r_need > r_budget else resume
+    job_fit    = truncate_to_tokens(job, j_budget) if j_need > j_budget else job
+    r_used, j_used = count_tokens(resume_fit), count_tokens(job_fit)
+    with _stats_lock:
+        _stats["prompts"]            += 1
+        _stats["input_tokens"]       += r_used + j_used
+        _stats["boilerplate_tokens"] += max(0, job_raw - j_need)
+        _stats["truncated_tokens"]   += (r_need - r_used) + (j_need - j_used)
+    return resume_fit, job_fit
+
+
+def budget_stats() -> dict:
+    with _stats_lock:
+        return {**_stats, "scale": PROMPT_BUDGET_SCALE}
@@ -0,0 +1,246 @@
+"""
+resume_parser.py — One-pass structured parse of resume text
+Splits the header block from ordered sections and types every line (bullet,
+company, role, title, date, degree, skill pair, text) in a single linear
+sweep. Results are immutable and memoized per text, so tailoring and PDF
+rendering of the same resume share one parse.
+"""
+
+import os
+import re
+import functools
+from typing import NamedTuple
+
+RESUME_PARSE_CACHE_SIZE = int(os.getenv("RESUME_PARSE_CACHE_SIZE", "256"))
+
+
+class Line(NamedTuple):
+    kind:  str          # blank | bullet | skill | title | company | role | date | degree | text
+                        # (header lines: name | contact | text)
+    text:  str          # stripped; bullets without their marker, skills: the label
+    value: str = ""     # skill pairs only
+
+
+class Section(NamedTuple):
+    label:     str      # header as written, stripped
+    key:       str      # lowercased label without trailing colon
+    kind:      str      # experience | education | skills | other
+    canonical: bool     # a standard header (SECTION_RE) — tailoring splits only on these
+    rank:      int      # ATS ordering, unknown sections last
+    line:      str      # original header line
+    raw:       tuple    # original body lines
+    lines:     tuple    # typed body lines
+
+
+class ParsedResume(NamedTuple):
+    header_raw: tuple   # original lines before the first section
+    header:     tuple   # typed non-empty header lines
+    sections:   tuple
+
+
+# ── Header rules ──────────────────────────────────────────────────────────────
+# Standard headers: the only ones tailoring treats as section boundaries
+SECTION_RE = re.compile(
+    r'^(PROFESSIONAL SUMMARY|SUMMARY|OBJECTIVE|PROFILE|'
+    r'PROFESSIONAL EXPERIENCE|WORK EXPERIENCE|EXPERIENCE|EMPLOYMENT|'
+    r'TECHNICAL SKILLS|SKILLS|COMPETENCIES|'
+    r'EDUCATION|'
+    r'PROJECTS|'
+    r'CERTIFICATIONS?|CERTIFICATES|LICENSES|'
+    r'ACHIEVEMENTS?|AWARDS|HONORS|'
+    r'PUBLICATIONS?|RESEARCH|'
+    r'VOLUNTEER|LANGUAGES|INTERESTS)\s*:?\s*$',
+    re.IGNORECASE
+)
+
+# ATS-priority ordered list
+ATS_ORDER = [
+    "summary", "professional summary", "career summary", "executive summary",
+    "objective", "career objective", "profile", "professional profile", "about",
+    "experience", "work experience", "professional experience", "employment",
+    "work history", "career history", "employment history",
+    "education", "academic background", "academic credentials",
+    "skills", "technical skills", "core competencies", "competencies",
+    "technical expertise", "key skills", "areas of expertise",
+    "certifications", "certification", "certificates", "licenses",
+    "projects", "personal projects", "key projects", "notable projects",
+    "achievements", "accomplishments", "key achievements",
+    "awards", "honors", "honors & awards", "awards & honors",
+    "publications", "research",
+    "volunteer", "volunteer experience",
+    "languages", "interests", "hobbies",
+]
+ATS_NAMES = frozenset(ATS_ORDER)
+
+SECTION_TOKENS = {
+    "summary", "experience", "education", "skills", "projects",
+    "certifications", "certification", "certificates", "achievements",
+    "accomplishments", "awards", "honors", "publications", "volunteer",
+    "languages", "interests", "profile", "objective", "history",
+    "competencies", "expertise", "background", "credentials",
+    "employment", "career", "research", "licenses", "hobbies",
+}
+
+SECTION_KINDS = (
+    ("education",  ("education", "academic", "credential")),
+    ("skills",     ("skill", "competenc", "technolog", "expertise")),
+    ("experience", ("experience", "employment", "history", "career")),
+)
+
+
+def is_section(s: str) -> bool:
+    """Loose header test used for layout: all-caps lines, known names, short token lines."""
+    stripped = s.strip().rstrip(":")
+    if not stripped or len(stripped) > 65:
+        return False
+    low = stripped.lower()
+    if stripped.isupper() and len(stripped) > 2:
+        return True
+    if low in ATS_NAMES:
+        return True
+    words = set(re.sub(r"[^a-z\s]", "", low).split())
+    if words & SECTION_TOKENS and len(stripped.split()) <= 5:
+        if not any(c in stripped for c in ["•", "@", ".", "http"]):
+            return True
+    return False
+
+
+def ats_rank(key: str) -> int:
+    low = key.lower()
+    for rank, kw in enumerate(ATS_ORDER):
+        if low == kw or kw in low or low in kw:
+            return rank
+    return 999
+
+
+def section_kind(key: str) -> str:
+    for kind, stems in SECTION_KINDS:
+        if any(stem in key for stem in stems):
+            return kind
+    return "other"
+
+
+# ── Line rules ────────────────────────────────────────────────────────────────
+BULLET_RE  = re.compile(r'^[•▪●\-–\*◦]\s')
+MARKER_RE  = re.compile(r"^[•▪●\-–\*◦]\s*")
+DATE_RE    = re.compile(r"jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec|20\d{2}|19\d{2}|present|current",
+                        re.IGNORECASE)
+PHONE_RE   = re.compile(r"\d{3}[-.\s]\d{3}[-.\s]\d{4}|\+\d[\d\s\(\)\-]{7,}")
+
+
+def is_bullet(s: str) -> bool:
+    return bool(BULLET_RE.match(s))
+
+
+def has_date(s: str) -> bool:
+    return bool(DATE_RE.search(s))
+
+
+def is_contact_line(s: str) -> bool:
+    low = s.lower()
+    return any(x in low for x in ["@", "linkedin", "github", "http", "phone:"]) \
+        or bool(PHONE_RE.search(s))
+
+
+def _type_lines(lines: list[str], kind: str) -> tuple:
+    """Type a section's stripped lines; walks backwards so "next non-empty line" is O(1)."""
+    typed  = [None] * len(lines)
+    next_s = ""
+    for i in range(len(lines) - 1, -1, -1):
+        s = lines[i]
+        if not s:
+            typed[i] = Line("blank", "")
+            continue
+        if is_bullet(s):
+            typed[i] = Line("bullet", MARKER_RE.sub("", s))
+        elif kind == "skills" and ":" in s:
+            label, value = s.split(":", 1)
+            typed[i] = Line("skill", label.strip(), value.strip())
+        elif kind == "education":
+            typed[i] = Line("date" if has_date(s) or "|" in s else "degree", s)
+        elif kind == "experience":
+            dated = has_date(s)
+            if "—" in s or ("–" in s and not dated):
+                typed[i] = Line("title", s)              # "Job Title — Company | Location"
+            elif next_s and has_date(next_s) and not is_bullet(next_s) and not dated:
+                typed[i] = Line("company", s)            # next line is role + dates
+            elif dated:
+                typed[i] = Line("role", s)
+            else:
+                typed[i] = Line("text", s)
+        else:
+            typed[i] = Line("text", s)
+        next_s = s
+    return tuple(typed)
+
+
+def _type_header(lines: list[str]) -> tuple:
+    typed = []
+    for s in (l.strip() for l in lines):
+        if not s:
+            continue
+        if not typed:
+            typed.append(Line("name", s))
+        elif is_contact_line(s) or "|" in s:
+            typed.append(Line("contact", s))
+        else:
+            typed.append(Line("text", s))
+    return tuple(typed)
+
+
+# ── Parser ────────────────────────────────────────────────────────────────────
+@functools.lru_cache(maxsize=RESUME_PARSE_CACHE_SIZE)
+def parse_resume(text: str) -> ParsedResume:
+    """Header block plus sections in document order; each line is examined once."""
+    header_raw = []
+    sections   = []
+    current    = None        # [label, line, canonical, raw lines]
+
+    def close():
+        label, line, canonical, raw = current
+        key  = label.lower().rstrip(":").strip()
+        kind = section_kind(key)
+        sections.append(Section(label, key, kind, canonical, ats_rank(key), line,
+                                tuple(raw), _type_lines([l.strip() for l in raw], kind)))
+
+    for line in text.strip().splitlines():
+        s = line.strip()
+        canonical = bool(s) and bool(SECTION_RE.match(s))
+        if s and (canonical or is_section(s)):
+            if current is not None:
+                close()
+            current = [s, line, canonical, []]
+        elif current is None:
+            header_raw.append(line)
+        else:
+            current[3].append(line)
+    if current is not None:
+        close()
+    return ParsedResume(tuple(header_raw), _type_header(header_raw), tuple(sections))
+
+
+def canonical_sections(parsed: ParsedResume) -> tuple[list[str], list[tuple[str, str]]]:
+    """(header block lines, [(header, content)]) split on standard headers only.
+
+    Non-standard headers (e.g. a company name in caps) stay inside the content
+    of the standard section they follow. With no standard header at all, both
+    parts are empty.
+    """
+    leading = list(parsed.header_raw)
+    header_block, sections = [], []
+    label, body = None, None
+    for sec in parsed.sections:
+        if sec.canonical:
+            if label is None:
+                header_block = leading
+            else:
+                sections.append((label, "\n".join(body).strip()))
+            label, body = sec.label, list(sec.raw)
+        else:
+            target = leading if label is None else body
+            target.append(sec.line)
+            target.extend(sec.raw)
+    if label is None:
+        return [], []
+    sections.append((label, "\n".join(body).strip()))
+    return header_block, sections